@@ -4,30 +4,56 @@ Rentrobe - Fashion Rental Platform
 Complete Flask Backend Application
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
+from flask import Flask, request, jsonify, session, redirect, url_for, flash, send_from_directory, send_file, abort, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from flask.json.provider import DefaultJSONProvider
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileAllowed
-from wtforms import StringField, TextAreaField, IntegerField, SelectField, DateField, validators
-from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import sys
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 import uuid
 import json
+import hashlib
+import base64
+import gzip
+import zlib
+import io
+import mimetypes
 import logging
+import heapq
+import tempfile
+import threading
+import time
+import weakref
+import click
+import importlib.util
+import re
+import bisect
+import random
+from collections import deque, defaultdict
+from functools import lru_cache
+from urllib.request import Request, urlopen
+import hmac
+from functools import wraps
+import subprocess
+from contextlib import contextmanager
 from pathlib import Path
 from sqlalchemy import or_, and_
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import joinedload, selectinload
+import sqlite3
 
 # Try to import PIL for image processing, fallback if not available
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+# Pillow is only needed for uploads and image variants; functions that use it import it
+# on first call so the app (and every cold start and CLI command) loads without it
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
+if not PIL_AVAILABLE:
     print("PIL not available - image processing disabled")
 
 # Initialize Flask app
@@ -37,8 +63,103 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'wearhouse-dev-secret-key-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///wearhouse.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# SQLite connection profiles, applied to every new connection (see configure_sqlite_connection)
+#   wal      - readers never wait for the writer; NORMAL sync is durable in WAL except on power loss
+#   rollback - SQLite's classic defaults (rollback journal, FULL sync), set explicitly
+#   none     - leave connections as SQLite opens them
+SQLITE_PROFILES = {
+    'wal': {
+        'busy_timeout': 5000,  # ms to wait for a lock before "database is locked"
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -32 * 1024,  # negative: KiB, so 32MB
+        'temp_store': 'MEMORY',
+    },
+    'rollback': {
+        'busy_timeout': 5000,
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+    },
+    'none': {},
+}
+SQLITE_PRAGMAS = ['busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store']
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'wal').lower()
+# Per-pragma overrides of the profile, e.g. SQLITE_MMAP_SIZE=268435456 or SQLITE_SYNCHRONOUS=FULL
+app.config['SQLITE_PRAGMA_OVERRIDES'] = {
+    name: os.environ[f'SQLITE_{name.upper()}'] for name in SQLITE_PRAGMAS if f'SQLITE_{name.upper()}' in os.environ
+}
 app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['IMPORT_BUDGET_MS'] = int(os.environ.get('IMPORT_BUDGET_MS', 800))  # cold `import app` measures ~450-750ms; see import-profile
+
+# Upload serving: cache lifetimes and optional hand-off of file bytes to a front proxy
+# UPLOAD_SERVE_MODE: 'direct' (Flask streams the file), 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+app.config['UPLOAD_SERVE_MODE'] = os.environ.get('UPLOAD_SERVE_MODE', 'direct').lower()
+app.config['UPLOAD_ACCEL_PREFIX'] = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+app.config['UPLOAD_CACHE_MAX_AGE'] = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 24 * 60 * 60))
+app.config['UPLOAD_IMMUTABLE_MAX_AGE'] = 365 * 24 * 60 * 60
+
+# Resized image variants generated on demand by /images/<filename>
+app.config['IMAGE_CACHE_FOLDER'] = os.environ.get('IMAGE_CACHE_FOLDER', os.path.join(app.instance_path, 'image_cache'))
+app.config['IMAGE_CACHE_MAX_BYTES'] = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Workers share the cache folder; each rescans it this often to see the others' writes
+app.config['IMAGE_CACHE_RESCAN_SECONDS'] = int(os.environ.get('IMAGE_CACHE_RESCAN_SECONDS', 60))
+app.config['IMAGE_VARIANT_WIDTHS'] = [160, 320, 480, 640, 800, 1200]
+app.config['BACKFILL_CHECKPOINT'] = os.path.join(app.instance_path, 'backfill_images.json')
+
+# Public catalog JSON cache and SPA bootstrap data embedded in the HTML shell
+app.config['CATALOG_CACHE_TTL'] = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+app.config['CATALOG_CACHE_MAX_ENTRIES'] = int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 256))
+app.config['CATALOG_CACHE_PAGES'] = int(os.environ.get('CATALOG_CACHE_PAGES', 5))  # deeper pages are built per request
+app.config['SPA_BOOTSTRAP'] = os.environ.get('SPA_BOOTSTRAP', 'True').lower() == 'true'
+
+# Connection pool for server databases (Postgres); sizes also apply to file SQLite
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # replace connections older than this
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))  # 0 disables
+
+# Optional read-only replica for catalog reads: a second server database, or a second
+# SQLite file refreshed from the primary with `flask sync-replica`
+app.config['DATABASE_REPLICA_URL'] = os.environ.get('DATABASE_REPLICA_URL')
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))  # read-your-writes window
+
+# Operational endpoints (/api/admin/*) answer only requests carrying this token in X-Admin-Token
+# (or as a bearer token)
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+
+# Request profiling: requests sent with X-Profile and the admin token, plus a random
+# PROFILE_SAMPLE_RATE fraction of all requests, run under cProfile. The newest PROFILE_KEEP
+# captures are kept in PROFILE_FOLDER; list and summarize them with `flask profiles`.
+app.config['PROFILE_FOLDER'] = os.environ.get('PROFILE_FOLDER', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 100))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+
+# Per-request timing: SQL count/time, JSON encoding and handler time, logged per request;
+# SERVER_TIMING also sends it to the browser in a Server-Timing header
+app.config['REQUEST_TIMING'] = os.environ.get('REQUEST_TIMING', 'True').lower() == 'true'
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', 'False').lower() == 'true'
+
+# Query statistics per SQL fingerprint; plans are captured for statements slower than SLOW_QUERY_MS
+app.config['QUERY_STATS'] = os.environ.get('QUERY_STATS', 'True').lower() == 'true'
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+app.config['QUERY_STATS_MAX_FINGERPRINTS'] = int(os.environ.get('QUERY_STATS_MAX_FINGERPRINTS', 500))
+
+# Lazy-load (N+1) detector for development and tests: 'off', 'warn' (log) or 'raise' (fail the
+# request when an endpoint exceeds its budget). Budgets map endpoint names to lazy loads per request.
+app.config['LAZY_LOAD_CHECK'] = os.environ.get('LAZY_LOAD_CHECK', 'off').lower()
+app.config['LAZY_LOAD_REPEAT_THRESHOLD'] = int(os.environ.get('LAZY_LOAD_REPEAT_THRESHOLD', 3))
+app.config['LAZY_LOAD_BUDGETS'] = {
+    'api_items': 0,
+    'api_categories': 0,
+    'api_user_items': 0,
+    'api_search': 0,
+}
+app.config['LAZY_LOAD_DEFAULT_BUDGET'] = None  # endpoints without a budget are only checked for repeats
 
 # Session configuration
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
@@ -53,11 +174,626 @@ if os.environ.get('NETLIFY') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
     app.config['SESSION_COOKIE_SAMESITE'] = 'None'
     app.config['SESSION_COOKIE_SECURE'] = True
 
-# Ensure upload directory exists
+# Ensure upload and image cache directories exist
 Path(app.config['UPLOAD_FOLDER']).mkdir(parents=True, exist_ok=True)
+Path(app.config['IMAGE_CACHE_FOLDER']).mkdir(parents=True, exist_ok=True)
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that counts checkouts, new connections, wait time and timeouts"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = {'checkouts': 0, 'connects': 0, 'timeouts': 0,
+                        'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0}
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics['timeouts'] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.metrics['checkouts'] += 1
+            self.metrics['wait_seconds_total'] += waited
+            self.metrics['wait_seconds_max'] = max(self.metrics['wait_seconds_max'], waited)
+    
+    def _create_connection(self):
+        self.metrics['connects'] += 1
+        return super()._create_connection()
+
+def database_engine_options(uri, pool_size=5, max_overflow=10, pool_timeout=10, pool_recycle=1800,
+                            pre_ping=True, statement_timeout_ms=0):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI"""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}  # in-memory SQLite keeps its single shared connection
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+    }
+    if url.get_backend_name() != 'sqlite':
+        # Server connections die when idle (server restarts, proxies, NAT timeouts)
+        options['pool_recycle'] = pool_recycle
+        options['pool_pre_ping'] = pre_ping
+    if url.get_backend_name() == 'postgresql' and statement_timeout_ms:
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout_ms)}'}
+    return options
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_MAX_OVERFLOW'],
+    pool_timeout=app.config['DB_POOL_TIMEOUT'],
+    pool_recycle=app.config['DB_POOL_RECYCLE'],
+    pre_ping=app.config['DB_POOL_PRE_PING'],
+    statement_timeout_ms=app.config['DB_STATEMENT_TIMEOUT_MS'],
+)
+
+if app.config['DATABASE_REPLICA_URL']:
+    app.config['SQLALCHEMY_BINDS'] = {'replica': {
+        'url': app.config['DATABASE_REPLICA_URL'],
+        **database_engine_options(
+            app.config['DATABASE_REPLICA_URL'],
+            pool_size=app.config['DB_POOL_SIZE'],
+            max_overflow=app.config['DB_MAX_OVERFLOW'],
+            pool_timeout=app.config['DB_POOL_TIMEOUT'],
+            pool_recycle=app.config['DB_POOL_RECYCLE'],
+            pre_ping=app.config['DB_POOL_PRE_PING'],
+            statement_timeout_ms=app.config['DB_STATEMENT_TIMEOUT_MS'],
+        )
+    }}
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session that sends reads to the replica bind inside @read_replica routes"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and g.get('db_use_replica') and 'replica' in self._db.engines):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+def pool_metrics(engine=None):
+    """Current state and counters of an engine's connection pool"""
+    pool = (engine or db.engine).pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    stats.update(getattr(pool, 'metrics', {}))
+    return stats
+
+def admin_token_valid():
+    """True if the current request carries the ADMIN_TOKEN.
+    
+    The token is read from X-Admin-Token, or from a bearer Authorization header for scrapers.
+    """
+    token = app.config['ADMIN_TOKEN']
+    supplied = request.headers.get('X-Admin-Token') or request.headers.get('Authorization', '').removeprefix('Bearer ')
+    # Compare bytes: compare_digest rejects str arguments with non-ASCII characters
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+def admin_token_required(f):
+    """Restrict an operational endpoint to requests with the ADMIN_TOKEN; 404 otherwise"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not admin_token_valid():
+            abort(404)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def sqlite_pragmas():
+    """The pragmas for new SQLite connections: the configured profile plus overrides"""
+    pragmas = {**SQLITE_PROFILES[app.config['SQLITE_PROFILE']], **app.config['SQLITE_PRAGMA_OVERRIDES']}
+    return [(name, pragmas[name]) for name in SQLITE_PRAGMAS if name in pragmas]
+
+@db.event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the SQLite pragma profile to every new connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas():
+        value = str(value)
+        if not value.lstrip('-').isalnum():
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        try:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.OperationalError as e:
+            # e.g. journal_mode on a read-only or immutable database
+            logger.warning(f"Could not set PRAGMA {name} = {value}: {e}")
+    cursor.close()
+
+# Request instrumentation
+access_logger = logging.getLogger('rentrobe.access')
+
+def request_timing():
+    """The timing record of the current request, or None outside requests or when disabled"""
+    if has_request_context():
+        return g.get('timing')
+    return None
+
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._timing_start = time.perf_counter()
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_timing_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    timing = request_timing()
+    if timing is not None:
+        timing['queries'] += 1
+        timing['sql'] += elapsed
+    if app.config['QUERY_STATS']:
+        query_stats.record(conn, statement, parameters, elapsed, executemany)
+
+# Lazy-load detector
+class LazyLoadBudgetExceeded(AssertionError):
+    """A request issued more lazy loads than its endpoint's budget allows"""
+
+def lazy_load_origin(depth=2):
+    """The innermost project frames below SQLAlchemy, as 'file:line (function)' entries"""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(app.root_path) and 'site-packages' not in filename:
+            frames.append(f"{os.path.relpath(filename, app.root_path)}:{frame.f_lineno} ({frame.f_code.co_name})")
+        frame = frame.f_back
+    return ' <- '.join(frames) or 'unknown'
+
+@db.event.listens_for(db.session, 'do_orm_execute')
+def count_lazy_load(orm_execute_state):
+    """Count lazy loads per relationship for the current request"""
+    if (app.config['LAZY_LOAD_CHECK'] == 'off' or orm_execute_state.lazy_loaded_from is None
+            or not has_request_context()):
+        return
+    loads = g.setdefault('lazy_loads', {})
+    key = str(orm_execute_state.loader_strategy_path[-1])  # e.g. 'Item.images'
+    entry = loads.get(key)
+    if entry is None:
+        loads[key] = entry = {'count': 0, 'origin': lazy_load_origin()}
+    entry['count'] += 1
+
+@app.after_request
+def check_lazy_loads(response):
+    """Report N+1 patterns and enforce per-endpoint lazy-load budgets"""
+    loads = g.get('lazy_loads')
+    if not loads:
+        return response
+    total = sum(entry['count'] for entry in loads.values())
+    budget = app.config['LAZY_LOAD_BUDGETS'].get(request.endpoint, app.config['LAZY_LOAD_DEFAULT_BUDGET'])
+    repeated = [f"{key} x{entry['count']} from {entry['origin']}" for key, entry in loads.items()
+                if entry['count'] >= app.config['LAZY_LOAD_REPEAT_THRESHOLD']]
+    if repeated:
+        logger.warning(f"Repeated lazy loads in {request.endpoint}: " + '; '.join(repeated))
+    if budget is not None and total > budget:
+        message = (f"{request.endpoint} issued {total} lazy loads (budget {budget}): " +
+                   '; '.join(f"{key} x{entry['count']} from {entry['origin']}" for key, entry in loads.items()))
+        if app.config['LAZY_LOAD_CHECK'] == 'raise':
+            raise LazyLoadBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+# Metrics
+class MetricsShard:
+    """One thread's counters and histograms; released with the thread's locals when it exits"""
+    __slots__ = ('counters', 'histograms', '__weakref__')
+    
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+class Metrics:
+    """Counters and histograms kept in per-thread shards.
+    
+    Each thread only ever writes its own shard, so recording takes no lock;
+    a scrape sums the shards of running threads plus the totals folded in
+    from threads that have exited (the dev server starts one per request).
+    """
+    
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._live = {}  # shard key -> (counters, histograms) of a running thread
+        self._retired = (defaultdict(float), {})
+        self._next_key = 0
+        # Taken when a thread creates its shard, when it exits and on scrapes; reentrant
+        # because a finished thread's shard can be released while a scrape holds it
+        self._lock = threading.RLock()
+    
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = MetricsShard()
+            with self._lock:
+                key = self._next_key
+                self._next_key += 1
+                self._live[key] = (shard.counters, shard.histograms)
+            weakref.finalize(shard, self._retire, key)
+        return shard
+    
+    def _retire(self, key):
+        """Fold an exited thread's shard into the retired totals"""
+        with self._lock:
+            counters, histograms = self._live.pop(key)
+            self._merge(self._retired, counters, histograms)
+    
+    def _merge(self, into, counters, histograms):
+        into_counters, into_histograms = into
+        for key, value in list(counters.items()):
+            into_counters[key] += value
+        for key, (buckets, total) in list(histograms.items()):
+            merged = into_histograms.setdefault(key, [[0] * (len(self.BUCKETS) + 1), 0.0])
+            for index, count in enumerate(list(buckets)):
+                merged[0][index] += count
+            merged[1] += total
+    
+    def inc(self, name, labels=(), value=1):
+        self._shard().counters[(name, labels)] += value
+    
+    def observe(self, name, labels, value):
+        histograms = self._shard().histograms
+        histogram = histograms.get((name, labels))
+        if histogram is None:
+            histogram = histograms[(name, labels)] = [[0] * (len(self.BUCKETS) + 1), 0.0]
+        histogram[0][bisect.bisect_left(self.BUCKETS, value)] += 1
+        histogram[1] += value
+    
+    def collect(self):
+        """Summed (counters, histograms) over all shards"""
+        totals = (defaultdict(float), {})
+        with self._lock:
+            for counters, histograms in [self._retired] + list(self._live.values()):
+                self._merge(totals, counters, histograms)
+        return totals
+    
+    def shard_count(self):
+        """Shards of running threads"""
+        return len(self._live)
+
+metrics = Metrics()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.metrics_in_flight = (('endpoint', request.endpoint or 'unmatched'),)
+    metrics.inc('rentrobe_http_requests_in_flight', g.metrics_in_flight)
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('metrics_start')
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe('rentrobe_http_request_duration_seconds', (('endpoint', endpoint),),
+                        time.perf_counter() - start)
+        metrics.inc('rentrobe_http_requests_total',
+                    (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    g.pop('metrics_start', None)
+    labels = g.pop('metrics_in_flight', None)
+    if labels is not None:
+        metrics.inc('rentrobe_http_requests_in_flight', labels, value=-1)
+
+def prometheus_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def runtime_gauges():
+    """Point-in-time values read at scrape time: pools, image pipeline and caches"""
+    gauges = []
+    engines = [('primary', db.engine)] + ([('replica', db.engines['replica'])] if 'replica' in db.engines else [])
+    for bind, engine in engines:
+        stats = pool_metrics(engine)
+        labels = (('bind', bind),)
+        for key in ('size', 'checked_out', 'checked_in', 'overflow'):
+            if key in stats:
+                gauges.append((f'rentrobe_db_pool_{key}', 'gauge', labels, stats[key]))
+        for key in ('checkouts', 'connects', 'timeouts'):
+            if key in stats:
+                gauges.append((f'rentrobe_db_pool_{key}_total', 'counter', labels, stats[key]))
+        if 'wait_seconds_total' in stats:
+            gauges.append(('rentrobe_db_pool_wait_seconds_total', 'counter', labels, stats['wait_seconds_total']))
+    
+    with _variant_locks_guard:
+        renders = list(_variant_locks.values())
+    gauges.append(('rentrobe_image_variant_queue_depth', 'gauge', (), sum(entry[1] for entry in renders)))
+    gauges.append(('rentrobe_image_variant_keys_in_flight', 'gauge', (), len(renders)))
+    gauges.append(('rentrobe_image_cache_bytes', 'gauge', (), _image_cache_stats['bytes'] or 0))
+    for key in ('hits', 'misses', 'evictions'):
+        gauges.append((f'rentrobe_image_cache_{key}_total', 'counter', (), _image_cache_stats[key]))
+    gauges.append(('rentrobe_catalog_cache_entries', 'gauge', (), len(_catalog_cache)))
+    return gauges
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    counters, histograms = metrics.collect()
+    lines = []
+    typed = set()
+    
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} {kind}')
+    
+    for (name, labels), value in sorted(counters.items()):
+        declare(name, 'gauge' if name.endswith('_in_flight') else 'counter')
+        lines.append(f'{name}{prometheus_labels(labels)} {value:g}')
+    for (name, labels), (buckets, total) in sorted(histograms.items()):
+        declare(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(Metrics.BUCKETS + (float('inf'),), buckets):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else f'{bound:g}'
+            lines.append(f'{name}_bucket{prometheus_labels(labels + (("le", le),))} {cumulative}')
+        lines.append(f'{name}_sum{prometheus_labels(labels)} {total:.6f}')
+        lines.append(f'{name}_count{prometheus_labels(labels)} {cumulative}')
+    for name, kind, labels, value in runtime_gauges():
+        declare(name, kind)
+        lines.append(f'{name}{prometheus_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+# Request profiling
+def profile_trigger():
+    """Why the current request should be profiled ('requested' or 'sampled'), or None"""
+    if request.headers.get('X-Profile') and admin_token_valid():
+        return 'requested'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        return 'sampled'
+    return None
+
+@app.before_request
+def start_request_profile():
+    trigger = profile_trigger()
+    if trigger is None:
+        return
+    import cProfile  # only profiled requests pay for the import
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler (or a debugger) already owns this thread
+        return
+    profile_id = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{request.endpoint or 'unmatched'}"
+    g.profile = {'profiler': profiler, 'id': profile_id, 'trigger': trigger, 'start': time.perf_counter()}
+
+@app.after_request
+def tag_profiled_response(response):
+    profile = g.get('profile')
+    if profile is not None:
+        profile['status'] = response.status_code
+        if profile['trigger'] == 'requested':
+            response.headers['X-Profile-Id'] = profile['id']
+    return response
+
+@app.teardown_request
+def save_request_profile(exc):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    profile['profiler'].disable()
+    try:
+        save_profile(profile['profiler'], {
+            'id': profile['id'],
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'query_string': request.query_string.decode('latin-1'),
+            'status': profile.get('status', 500),
+            'duration_ms': round((time.perf_counter() - profile['start']) * 1000, 2),
+            'trigger': profile['trigger'],
+            'pid': os.getpid(),
+        })
+    except OSError as e:
+        logger.warning(f"Could not save profile {profile['id']}: {e}")
+
+def save_profile(profiler, meta):
+    """Write <id>.prof (pstats data) and <id>.json (request details), then drop the oldest captures"""
+    folder = Path(app.config['PROFILE_FOLDER'])
+    folder.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(folder / f"{meta['id']}.prof")
+    (folder / f"{meta['id']}.json").write_text(json.dumps(meta))
+    
+    captures = sorted(folder.glob('*.prof'))
+    for old in captures[:max(len(captures) - app.config['PROFILE_KEEP'], 0)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.json').unlink(missing_ok=True)
+
+def list_profiles(endpoint=None):
+    """Details of the saved captures, newest first"""
+    folder = Path(app.config['PROFILE_FOLDER'])
+    profiles = []
+    for path in sorted(folder.glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # rotated away or half-written by another process
+        if endpoint is None or meta.get('endpoint') == endpoint:
+            profiles.append(meta)
+    return profiles
+
+# Slow query recorder
+FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                      # string literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                    # numbers
+    (re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+'), '?'),               # driver placeholders
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?+)'),          # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+@lru_cache(maxsize=2048)
+def sql_fingerprint(statement):
+    """Normalize SQL so statements differing only in literals and list lengths match"""
+    for pattern, replacement in FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+class QueryStats:
+    """Bounded in-memory table of per-fingerprint query timings.
+    
+    Keeps a count, total and the most recent samples (for p95) per
+    fingerprint. When full, the least recently seen fingerprint is dropped.
+    The first time a SELECT runs slower than SLOW_QUERY_MS its plan is
+    captured, along with the endpoint and query string that issued it.
+    """
+    
+    SAMPLES = 256
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+    
+    def record(self, conn, statement, parameters, elapsed, executemany=False):
+        fingerprint = sql_fingerprint(statement)
+        with self.lock:
+            entry = self.entries.pop(fingerprint, None)  # re-inserted last: dict order is recency
+            if entry is None:
+                entry = {'count': 0, 'total': 0.0, 'max': 0.0, 'samples': deque(maxlen=self.SAMPLES),
+                         'slow': 0, 'plan': None, 'example': None}
+                while len(self.entries) >= app.config['QUERY_STATS_MAX_FINGERPRINTS']:
+                    del self.entries[next(iter(self.entries))]
+            self.entries[fingerprint] = entry
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['samples'].append(elapsed)
+            slow = elapsed * 1000 >= app.config['SLOW_QUERY_MS']
+            if slow:
+                entry['slow'] += 1
+            capture = slow and entry['plan'] is None and not executemany
+            if capture:
+                entry['plan'] = []  # claimed; filled in below, outside the lock
+        if capture:
+            entry['example'] = {
+                'ms': round(elapsed * 1000, 2),
+                'endpoint': request.endpoint if has_request_context() else None,
+                'query_string': request.query_string.decode('utf-8', 'replace') if has_request_context() else None,
+            }
+            entry['plan'] = explain_query(conn, statement, parameters)
+    
+    def snapshot(self, sort='total', limit=50):
+        """Aggregated rows, slowest first by the given key"""
+        with self.lock:
+            items = [(fingerprint, dict(entry, samples=sorted(entry['samples'])))
+                     for fingerprint, entry in self.entries.items()]
+        rows = []
+        for fingerprint, entry in items:
+            samples = entry['samples']
+            p95 = samples[(len(samples) * 95 + 99) // 100 - 1]  # nearest rank: ceil(0.95 * n)
+            rows.append({
+                'fingerprint': fingerprint,
+                'count': entry['count'],
+                'total_ms': round(entry['total'] * 1000, 2),
+                'mean_ms': round(entry['total'] / entry['count'] * 1000, 3),
+                'p95_ms': round(p95 * 1000, 3),
+                'max_ms': round(entry['max'] * 1000, 2),
+                'slow_count': entry['slow'],
+                'plan': entry['plan'],
+                'example': entry['example'],
+            })
+        rows.sort(key=lambda row: row[f'{sort}_ms' if sort != 'count' else 'count'], reverse=True)
+        return rows[:limit]
+    
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+
+query_stats = QueryStats()
+
+def explain_query(conn, statement, parameters):
+    """Query plan for a SELECT, run on a separate cursor of the same connection.
+    
+    On server databases a failed statement aborts the whole transaction, so
+    EXPLAIN runs inside a savepoint and a failure leaves the request's
+    transaction usable.
+    """
+    if not statement.lstrip().upper().startswith('SELECT'):
+        return None
+    sqlite = conn.dialect.name == 'sqlite'
+    prefix = 'EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN '
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if not sqlite:
+                cursor.execute('SAVEPOINT explain_plan')
+            try:
+                cursor.execute(prefix + statement, parameters)
+                plan = [str(row[-1]) for row in cursor.fetchall()]  # SQLite: detail column; Postgres: plan line
+            except Exception:
+                if not sqlite:
+                    cursor.execute('ROLLBACK TO SAVEPOINT explain_plan')
+                raise
+            if not sqlite:
+                cursor.execute('RELEASE SAVEPOINT explain_plan')
+            return plan
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f'plan unavailable: {e}']
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds encoding time to the request timing"""
+    
+    def dumps(self, obj, **kwargs):
+        timing = request_timing()
+        if timing is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            timing['serialize'] += time.perf_counter() - start
+
+app.json = TimedJSONProvider(app)
+
+@app.before_request
+def start_request_timing():
+    if app.config['REQUEST_TIMING']:
+        g.timing = {'start': time.perf_counter(), 'queries': 0, 'sql': 0.0, 'serialize': 0.0}
+
+@app.after_request
+def finish_request_timing(response):
+    """Log the request's timing breakdown and optionally send it as Server-Timing"""
+    timing = request_timing()
+    if timing is None:
+        return response
+    total = time.perf_counter() - timing['start']
+    other = max(total - timing['sql'] - timing['serialize'], 0)
+    if app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={timing["sql"] * 1000:.2f};desc="{timing["queries"]} queries"',
+            f'ser;dur={timing["serialize"] * 1000:.2f}',
+            f'app;dur={other * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ]))
+    access_logger.info(f'{request.method} {request.full_path.rstrip("?")} {response.status_code} '
+                       f'{total * 1000:.1f}ms db={timing["queries"]}q/{timing["sql"] * 1000:.1f}ms '
+                       f'ser={timing["serialize"] * 1000:.1f}ms app={other * 1000:.1f}ms')
+    return response
+
 bcrypt = Bcrypt(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -116,13 +852,14 @@ class Category(db.Model):
     # Relationships
     items = db.relationship('Item', backref='category', lazy=True)
 
-    def to_dict(self):
+    def to_dict(self, count=None):
+        """count: active item count when already known (see categories_json)"""
         return {
             'id': self.id,
             'name': self.name,
             'slug': self.slug,
             'icon': self.icon,
-            'count': len([item for item in self.items if item.is_active])
+            'count': count if count is not None else len([item for item in self.items if item.is_active])
         }
 
 class Item(db.Model):
@@ -164,6 +901,8 @@ class Item(db.Model):
             'reviews': self.reviews_count,
             'views': self.views,
             'images': [img.filename for img in self.images],
+            # Only the first image is painted before it loads; previews are ~1KB each
+            'placeholder': self.images[0].placeholder_dict() if self.images else None,
             'date_added': self.date_added.isoformat() if self.date_added else None
         }
         
@@ -184,10 +923,19 @@ class ItemImage(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
-    filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
+    source_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 of the original upload
+    placeholder_color = db.Column(db.String(7), nullable=True)  # dominant color, e.g. '#a0b1c2'
+    placeholder = db.Column(db.Text, nullable=True)  # ~16px preview as a data URI
     is_primary = db.Column(db.Boolean, default=False)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def placeholder_dict(self):
+        return {
+            'color': self.placeholder_color,
+            'preview': self.placeholder
+        }
+
 class Rental(db.Model):
     __tablename__ = 'rentals'
     
@@ -252,37 +1000,114 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
+def content_addressed_name(data, extension):
+    """Return the storage filename for processed image bytes"""
+    return hashlib.sha256(data).hexdigest() + '.' + extension
+
+def is_content_addressed(filename):
+    """Check whether an upload filename is a content hash (and therefore immutable)"""
+    stem = filename.rsplit('.', 1)[0]
+    return len(stem) == 64 and all(c in '0123456789abcdef' for c in stem)
+
+def write_upload(filename, data):
+    """Atomically write image bytes into the upload folder unless already stored"""
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if os.path.exists(filepath):
+        return filepath
+    tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, filepath)
+    return filepath
+
+def compute_placeholder(image, size=16):
+    """Dominant color and a tiny preview image to paint before the real image loads"""
+    from PIL import Image
+    
+    preview = image.convert('RGB')
+    preview.thumbnail((size, size), Image.Resampling.BOX)
+    # Most common of 4 quantized colors; the mean of a red dress on white is pink
+    quantized = preview.quantize(colors=4)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+    output = io.BytesIO()
+    preview.save(output, 'JPEG', quality=50)
+    return {
+        'placeholder_color': f'#{r:02x}{g:02x}{b:02x}',
+        'placeholder': 'data:image/jpeg;base64,' + base64.b64encode(output.getvalue()).decode('ascii')
+    }
+
+def encode_image(data):
+    """Resize and re-encode raw upload bytes, returning (bytes, extension, placeholder)"""
+    from PIL import Image
+    
+    image = Image.open(io.BytesIO(data))
+    
+    # Convert RGBA to RGB if needed
+    if image.mode in ('RGBA', 'LA', 'P'):
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    # Resize image
+    image.thumbnail((800, 600), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, 'JPEG', optimize=True, quality=85)
+    return output.getvalue(), 'jpg', compute_placeholder(image)
+
+def encode_upload(data, original_filename):
+    """Processed bytes, extension and placeholder for raw upload bytes"""
+    if PIL_AVAILABLE:
+        return encode_image(data)
+    # Save file directly if PIL not available
+    return data, original_filename.rsplit('.', 1)[1].lower(), {}
+
 def save_image(file):
-    """Save uploaded image and return filename"""
+    """Save uploaded image under a hash of its processed bytes.
+    
+    Returns the ItemImage column values for the stored file, or None.
+    Identical uploads resolve to the same file; when the original bytes
+    have been seen before the stored file is reused without re-encoding.
+    """
     if file and allowed_file(file.filename):
-        # Generate unique filename
-        filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
         try:
-            if PIL_AVAILABLE:
-                # Resize and optimize image
-                image = Image.open(file)
-                
-                # Convert RGBA to RGB if needed
-                if image.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', image.size, (255, 255, 255))
-                    background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                    image = background
-                
-                # Resize image
-                image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-                image.save(filepath, 'JPEG', optimize=True, quality=85)
-            else:
-                # Save file directly if PIL not available
-                file.save(filepath)
+            data = file.read()
+            source_hash = hashlib.sha256(data).hexdigest()
+            
+            # Cache hit: the same original was already processed and stored
+            existing = ItemImage.query.filter_by(source_hash=source_hash).first()
+            if existing and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], existing.filename)):
+                return {
+                    'filename': existing.filename,
+                    'source_hash': source_hash,
+                    'placeholder_color': existing.placeholder_color,
+                    'placeholder': existing.placeholder
+                }
             
-            return filename
+            processed, extension, placeholder = encode_upload(data, file.filename)
+            filename = content_addressed_name(processed, extension)
+            write_upload(filename, processed)
+            return {'filename': filename, 'source_hash': source_hash, **placeholder}
         except Exception as e:
             logger.error(f"Error saving image: {e}")
             return None
     return None
 
+def restore_upload(file, filename):
+    """Write a stored upload again from the request's original bytes.
+    
+    A reused file can be collected by gc-uploads while the row that will
+    reference it is still uncommitted; once the row is committed gc keeps it.
+    """
+    file.seek(0)
+    processed, _, _ = encode_upload(file.read(), file.filename)
+    write_upload(filename, processed)
+    logger.warning(f"Restored upload {filename}, collected before its row was committed")
+
 def calculate_rental_cost(item, start_date, end_date):
     """Calculate total rental cost"""
     days = (end_date - start_date).days
@@ -290,12 +1115,141 @@ def calculate_rental_cost(item, start_date, end_date):
         days = 1
     return days * item.price_per_day
 
+# SPA shell: index.html has no template expressions, so it is read once and served as bytes
+_spa_shell = {'path': os.path.join(app.root_path, 'templates', 'index.html'), 'mtime': None}
+_spa_shell_lock = threading.Lock()
+
+BOOTSTRAP_MARKER = b'</body>'
+
+def load_spa_shell():
+    """Return the cached shell, re-reading it when it changed on disk in debug mode"""
+    path = _spa_shell['path']
+    if _spa_shell['mtime'] is not None and not (app.debug or app.config.get('TEMPLATES_AUTO_RELOAD')):
+        return _spa_shell
+    
+    mtime = os.stat(path).st_mtime
+    if mtime != _spa_shell['mtime']:
+        with _spa_shell_lock:
+            if mtime != _spa_shell['mtime']:
+                with open(path, 'rb') as f:
+                    body = f.read()
+                
+                # Split where bootstrap data is injected; the prefix is compressed once
+                # and the compressor state is copied per request for the small tail
+                split = body.rfind(BOOTSTRAP_MARKER)
+                if split == -1:
+                    split = len(body)
+                prefix, suffix = body[:split], body[split:]
+                compressor = zlib.compressobj(9, zlib.DEFLATED, 31)  # 31 = gzip container
+                prefix_gzip = compressor.compress(prefix) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                
+                _spa_shell.update({
+                    'body': body,
+                    'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+                    'etag': hashlib.sha256(body).hexdigest()[:32],
+                    'prefix': prefix,
+                    'suffix': suffix,
+                    'prefix_gzip': prefix_gzip,
+                    'compressor': compressor,
+                    'rendered': {},  # etag -> body, so anonymous visitors share one render
+                    'mtime': mtime
+                })
+    return _spa_shell
+
+def spa_bootstrap_json():
+    """First catalog page, categories and current user for the shell, as embeddable JSON"""
+    user = current_user.to_dict() if current_user.is_authenticated else None
+    data = (
+        '{"categories":' + categories_json()
+        + ',"items":' + items_page_json()
+        + ',"user":' + app.json.dumps(user) + '}'
+    )
+    # Keep the payload from closing the surrounding <script> element
+    return data.replace('</', '<\\/')
+
+def spa_shell_response():
+    """Serve the SPA shell from memory with a strong ETag and optional gzip"""
+    shell = load_spa_shell()
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = shell['etag']
+    
+    bootstrap = None
+    if app.config['SPA_BOOTSTRAP']:
+        try:
+            bootstrap = spa_bootstrap_json()
+        except Exception as e:
+            logger.error(f"Error building SPA bootstrap data: {e}")
+    
+    if bootstrap is None:
+        body = shell['gzip'] if use_gzip else shell['body']
+    else:
+        etag += '-' + hashlib.sha256(bootstrap.encode('utf-8')).hexdigest()[:16]
+        key = etag + ('-gz' if use_gzip else '')
+        body = shell['rendered'].get(key)
+        if body is None:
+            tail = (f'<script id="bootstrap-data" type="application/json">{bootstrap}</script>\n'.encode('utf-8')
+                    + shell['suffix'])
+            if use_gzip:
+                compressor = shell['compressor'].copy()
+                body = shell['prefix_gzip'] + compressor.compress(tail) + compressor.flush()
+            else:
+                body = shell['prefix'] + tail
+            if len(shell['rendered']) >= 32:
+                shell['rendered'].clear()
+            shell['rendered'][key] = body
+    
+    response = app.response_class(body, mimetype='text/html')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    if bootstrap is not None:
+        response.vary.add('Cookie')  # the embedded user depends on the session
+        if current_user.is_authenticated:
+            response.cache_control.private = True  # embeds the user's contact details
+    response.set_etag(etag + ('-gz' if use_gzip else ''))
+    response.cache_control.no_cache = True  # always revalidate, 304 when unchanged
+    return response.make_conditional(request)
+
+# Static files: prefer .br/.gz siblings written by build_static.py when the client accepts them
+PRECOMPRESSED_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+@lru_cache(maxsize=1024)  # bounded: clients can ask for any path
+def precompressed_exists(sibling):
+    path = safe_join(app.static_folder, sibling)
+    return bool(path and os.path.isfile(path))
+
+def precompressed_variant(filename):
+    """Return (encoding, sibling filename) for the best precompressed copy the client accepts"""
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if request.accept_encodings[encoding] <= 0:
+            continue  # not offered, or refused with q=0
+        sibling = filename + suffix
+        exists = precompressed_exists.__wrapped__(sibling) if app.debug else precompressed_exists(sibling)
+        if exists:
+            return encoding, sibling
+    return None, filename
+
+def static_file(filename):
+    """Serve static files, using a precompressed sibling when one exists"""
+    encoding, sibling = precompressed_variant(filename)
+    if encoding is None:
+        return app.send_static_file(filename)
+    
+    response = send_from_directory(app.static_folder, sibling,
+                                   mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                                   max_age=app.get_send_file_max_age(filename))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = static_file
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
     if request.path.startswith('/api/'):
         return jsonify({'error': 'Not found'}), 404
-    return render_template('index.html')
+    return spa_shell_response()
 
 @app.errorhandler(500)
 def internal_error(error):
@@ -303,7 +1257,7 @@ def internal_error(error):
     logger.error(f"Internal server error: {error}")
     if request.path.startswith('/api/'):
         return jsonify({'error': 'Internal server error'}), 500
-    return render_template('index.html')
+    return spa_shell_response()
 
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(error):
@@ -313,25 +1267,441 @@ def handle_file_too_large(error):
 @app.route('/')
 def index():
     """Main page - serves the complete HTML application"""
-    return render_template('index.html')
+    return spa_shell_response()
 
 @app.route('/static/uploads/<filename>')
 def uploaded_file(filename):
-    """Serve uploaded files"""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Serve uploaded files with caching, conditional and range request support"""
+    mode = app.config['UPLOAD_SERVE_MODE']
+    
+    if mode in ('x-accel', 'x-sendfile'):
+        response = proxy_upload_response(filename, mode)
+    else:
+        # send_from_directory handles ETag/Last-Modified, 304s and Range requests;
+        # a content hash is a better ETag than mtime and size
+        etag = filename.rsplit('.', 1)[0] if is_content_addressed(filename) else True
+        response = send_from_directory(app.config['UPLOAD_FOLDER'], filename, etag=etag)
+    
+    return apply_upload_cache_headers(response, is_content_addressed(filename))
+
+def apply_upload_cache_headers(response, immutable):
+    """Set public caching on an image response"""
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    if immutable:
+        # Content-addressed names never change meaning, so cache them forever
+        response.cache_control.max_age = app.config['UPLOAD_IMMUTABLE_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = app.config['UPLOAD_CACHE_MAX_AGE']
+    return response
+
+def proxy_upload_response(filename, mode):
+    """Build an empty response that tells the front proxy which file to send.
+    
+    Conditional requests are still answered here so the proxy only streams
+    bytes for cache misses; Range handling is left to the proxy.
+    """
+    filepath = safe_join(app.config['UPLOAD_FOLDER'], filename)
+    if filepath is None or not os.path.isfile(filepath):
+        abort(404)
+    
+    stat = os.stat(filepath)
+    response = app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    if is_content_addressed(filename):
+        response.set_etag(filename.rsplit('.', 1)[0])
+    else:
+        response.set_etag(hashlib.sha256(f"{stat.st_mtime_ns}-{stat.st_size}-{filename}".encode('utf-8')).hexdigest()[:32])
+    response.last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    
+    if mode == 'x-accel':
+        response.headers['X-Accel-Redirect'] = app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+    else:
+        response.headers['X-Sendfile'] = filepath
+    
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        # Nothing for the proxy to send
+        response.headers.pop('X-Accel-Redirect', None)
+        response.headers.pop('X-Sendfile', None)
+    return response
+
+# Image variants
+IMAGE_VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'png': ('PNG', 'png', 'image/png'),
+}
+
+_variant_locks = {}
+_variant_locks_guard = threading.Lock()
+_image_cache_lock = threading.Lock()
+_image_cache_stats = {'bytes': None, 'scanned_at': 0.0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+@contextmanager
+def single_flight(key):
+    """Serialize work on the same key so concurrent misses only render once"""
+    with _variant_locks_guard:
+        entry = _variant_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _variant_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _variant_locks[key]
+
+def variant_width(requested):
+    """Snap a requested width to the next configured variant width"""
+    widths = app.config['IMAGE_VARIANT_WIDTHS']
+    for width in widths:
+        if requested <= width:
+            return width
+    return widths[-1]
+
+def render_variant(source_path, width, fmt):
+    """Decode a stored upload and encode it at the given width and format"""
+    from PIL import Image
+    
+    pil_format = IMAGE_VARIANT_FORMATS[fmt][0]
+    with Image.open(source_path) as image:
+        image.draft('RGB', (width, width * 4))  # let JPEG decode at reduced scale
+        if pil_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        if pil_format == 'PNG':
+            image.save(output, pil_format, optimize=True)
+        else:
+            image.save(output, pil_format, quality=82)
+        return output.getvalue()
+
+def scan_image_cache():
+    """(mtime, size, path) of every cached variant, skipping renders still in progress"""
+    files = []
+    with os.scandir(app.config['IMAGE_CACHE_FOLDER']) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # evicted by another worker
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    _image_cache_stats['bytes'] = sum(size for _, size, _ in files)
+    _image_cache_stats['scanned_at'] = time.monotonic()
+    return files
+
+def image_cache_size():
+    """Bytes held by the variant cache.
+    
+    The running total only counts this process's writes, so it is replaced
+    by a directory scan every IMAGE_CACHE_RESCAN_SECONDS.
+    """
+    stale = time.monotonic() - _image_cache_stats['scanned_at'] > app.config['IMAGE_CACHE_RESCAN_SECONDS']
+    if _image_cache_stats['bytes'] is None or stale:
+        scan_image_cache()
+    return _image_cache_stats['bytes']
+
+def evict_image_cache(keep=None):
+    """Remove least recently used variants until the cache is under 90% of its limit"""
+    limit = app.config['IMAGE_CACHE_MAX_BYTES']
+    with _image_cache_lock:
+        if image_cache_size() <= limit:
+            return
+        files = scan_image_cache()  # evict against what is on disk, not this process's estimate
+        files.sort()
+        target = int(limit * 0.9)
+        for _, size, path in files:
+            if _image_cache_stats['bytes'] <= target:
+                break
+            if path == keep:
+                continue  # about to be served
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            _image_cache_stats['bytes'] -= size
+            _image_cache_stats['evictions'] += 1
+
+def variant_cache_key(filename, stat, width, fmt):
+    """Cache filename for a variant.
+    
+    Content-addressed sources never change, so their hash is the whole key;
+    other files include the source mtime so replaced files miss.
+    """
+    stem = filename.rsplit('.', 1)[0]
+    if is_content_addressed(filename):
+        return f"{stem}-{width}w.{IMAGE_VARIANT_FORMATS[fmt][1]}"
+    return f"{stem}-{int(stat.st_mtime)}-{width}w.{IMAGE_VARIANT_FORMATS[fmt][1]}"
+
+def get_image_variant(filename, width, fmt):
+    """Return the path of a cached variant, rendering it on first request"""
+    source_path = safe_join(app.config['UPLOAD_FOLDER'], filename)
+    if source_path is None or not os.path.isfile(source_path):
+        return None
+    
+    key = variant_cache_key(filename, os.stat(source_path), width, fmt)
+    cache_path = os.path.join(app.config['IMAGE_CACHE_FOLDER'], key)
+    
+    if os.path.exists(cache_path):
+        os.utime(cache_path)  # mark as recently used
+        with _image_cache_lock:
+            _image_cache_stats['hits'] += 1
+        return cache_path
+    
+    with single_flight(key):
+        if os.path.exists(cache_path):
+            # Rendered by a concurrent request while we waited
+            with _image_cache_lock:
+                _image_cache_stats['hits'] += 1
+            return cache_path
+        
+        with _image_cache_lock:
+            _image_cache_stats['misses'] += 1
+        data = render_variant(source_path, width, fmt)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+        with _image_cache_lock:
+            _image_cache_stats['bytes'] = image_cache_size() + len(data)
+    
+    evict_image_cache(keep=cache_path)
+    return cache_path
+
+@app.route('/images/<filename>')
+def image_variant(filename):
+    """Serve a stored upload resized to ?w= in ?format= (jpeg, webp, png or auto)"""
+    if not PIL_AVAILABLE:
+        return redirect(url_for('uploaded_file', filename=filename))
+    
+    width = variant_width(request.args.get('w', app.config['IMAGE_VARIANT_WIDTHS'][-1], type=int))
+    fmt = request.args.get('format', 'jpeg').lower()
+    if fmt == 'auto':
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    if fmt not in IMAGE_VARIANT_FORMATS:
+        return jsonify({'error': 'Unsupported format'}), 400
+    
+    response = None
+    for _ in range(2):
+        try:
+            cache_path = get_image_variant(filename, width, fmt)
+            if cache_path is None:
+                return jsonify({'error': 'Not found'}), 404
+            response = send_file(cache_path, mimetype=IMAGE_VARIANT_FORMATS[fmt][2])
+            break
+        except FileNotFoundError:
+            continue  # evicted between lookup and send, render again
+        except Exception as e:
+            logger.error(f"Error rendering variant of {filename}: {e}")
+            return jsonify({'error': 'Failed to process image'}), 500
+    if response is None:
+        return jsonify({'error': 'Failed to process image'}), 500
+    
+    if request.args.get('format', '').lower() == 'auto':
+        response.vary.add('Accept')
+    return apply_upload_cache_headers(response, is_content_addressed(filename))
+
+# Read replica routing with read-your-writes stickiness
+def read_replica(f):
+    """Serve a read-only route from the replica bind, unless this client wrote recently"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        wrote_at = session.get('db_wrote_at', 0)
+        g.db_use_replica = time.time() - wrote_at > app.config['REPLICA_STICKY_SECONDS']
+        return f(*args, **kwargs)
+    return decorated_function
+
+@contextmanager
+def primary_reads():
+    """Temporarily send reads back to the primary inside a @read_replica route"""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_use_replica', False)
+    g.db_use_replica = False
+    try:
+        yield
+    finally:
+        g.db_use_replica = previous
+
+@db.event.listens_for(db.session, 'after_flush')
+def note_write(session, flush_context):
+    if has_request_context() and next(significant_changes(session), None) is not None:
+        g.db_wrote = True
+
+@db.event.listens_for(db.session, 'do_orm_execute')
+def note_bulk_write(orm_execute_state):
+    if has_request_context() and (orm_execute_state.is_update or orm_execute_state.is_delete):
+        g.db_wrote = True
+
+@app.after_request
+def remember_write(response):
+    """Pin this client to the primary for REPLICA_STICKY_SECONDS after it changes data"""
+    if g.get('db_wrote') and 'replica' in db.engines:
+        session['db_wrote_at'] = time.time()
+    return response
+
+# Catalog cache: serialized public catalog responses, shared by the API and the SPA bootstrap
+# Keys come from query parameters, so entries are kept in LRU order (dict order) and capped
+_catalog_cache = {}
+_catalog_cache_lock = threading.Lock()
+
+CATALOG_SORTS = ('newest', 'oldest', 'price-low', 'price-high', 'name-asc', 'name-desc')
+
+def cached_catalog(key, builder):
+    """Return the cached JSON text for key, building it when missing or expired"""
+    now = time.monotonic()
+    entry = _catalog_cache.get(key)
+    if entry and now - entry[0] < app.config['CATALOG_CACHE_TTL']:
+        metrics.inc('rentrobe_catalog_cache_hits_total')
+        with _catalog_cache_lock:
+            if _catalog_cache.pop(key, None) is not None:
+                _catalog_cache[key] = entry  # most recently used goes last
+        return entry[1]
+    metrics.inc('rentrobe_catalog_cache_misses_total')
+    with primary_reads():  # never cache what a lagging replica returns
+        value = builder()
+    with _catalog_cache_lock:
+        _catalog_cache.pop(key, None)
+        _catalog_cache[key] = (now, value)
+        while len(_catalog_cache) > app.config['CATALOG_CACHE_MAX_ENTRIES']:
+            del _catalog_cache[next(iter(_catalog_cache))]
+    return value
+
+def invalidate_catalog_cache():
+    _catalog_cache.clear()
+
+def significant_changes(session):
+    """Objects a flush writes, ignoring view counter bumps from item detail pages"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Item) and obj in session.dirty:
+            changed = [attr.key for attr in db.inspect(obj).attrs if attr.history.has_changes()]
+            if changed == ['views']:
+                continue
+        yield obj
+
+@db.event.listens_for(db.session, 'after_flush')
+def catalog_changed(session, flush_context):
+    """Drop cached catalog JSON when a flush touches rows it is built from"""
+    for obj in significant_changes(session):
+        if isinstance(obj, (Item, ItemImage, Category, User)):
+            invalidate_catalog_cache()
+            return
+
+def categories_json():
+    """Serialized active categories"""
+    def build():
+        categories = Category.query.filter_by(is_active=True).all()
+        counts = dict(db.session.query(Item.category_id, db.func.count(Item.id))
+                      .filter(Item.is_active == True).group_by(Item.category_id))
+        return app.json.dumps([cat.to_dict(count=counts.get(cat.id, 0)) for cat in categories])
+    return cached_catalog(('categories',), build)
+
+# Relationships Item.to_dict() reads, loaded up front for lists of items
+ITEM_LIST_LOADS = (selectinload(Item.images), joinedload(Item.category), joinedload(Item.owner))
+
+def items_page_payload(page=1, per_page=12, category=None, size=None, min_price=None,
+                       max_price=None, city=None, search=None, sort='newest'):
+    """Filtered, sorted and paginated items as returned by /api/items"""
+    query = Item.query.options(*ITEM_LIST_LOADS).filter(Item.is_active == True)
+    
+    # Apply filters
+    if category:
+        cat = Category.query.filter_by(slug=category).first()
+        if cat:
+            query = query.filter(Item.category_id == cat.id)
+    
+    if size:
+        query = query.filter(Item.size == size)
+    
+    if min_price:
+        query = query.filter(Item.price_per_day >= min_price * 100)
+    
+    if max_price:
+        query = query.filter(Item.price_per_day <= max_price * 100)
+    
+    if city:
+        query = query.join(User).filter(User.city.ilike(f'%{city}%'))
+    
+    if search:
+        query = query.filter(or_(
+            Item.title.ilike(f"%{search}%"),
+            Item.description.ilike(f"%{search}%")
+        ))
+    
+    # Apply sorting
+    if sort == 'price-low':
+        query = query.order_by(Item.price_per_day.asc())
+    elif sort == 'price-high':
+        query = query.order_by(Item.price_per_day.desc())
+    elif sort == 'name-asc':
+        query = query.order_by(Item.title.asc())
+    elif sort == 'name-desc':
+        query = query.order_by(Item.title.desc())
+    elif sort == 'oldest':
+        query = query.order_by(Item.date_added.asc())
+    else:  # default to newest
+        query = query.order_by(Item.date_added.desc())
+    
+    # Paginate
+    pagination = query.paginate(
+        page=page, 
+        per_page=per_page, 
+        error_out=False,
+        max_per_page=100
+    )
+    items = pagination.items
+    
+    return {
+        'items': [item.to_dict() for item in items],
+        'pagination': {
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+    }
+
+def items_page_json(page=1, per_page=12, category=None, sort='newest'):
+    """Serialized unfiltered catalog page (optionally by category).
+    
+    Only the first CATALOG_CACHE_PAGES pages at the default page size are
+    cached; other combinations are built on every request.
+    """
+    if sort not in CATALOG_SORTS:
+        sort = 'newest'  # what items_page_payload falls back to
+    build = lambda: app.json.dumps(items_page_payload(page=page, per_page=per_page, category=category, sort=sort))
+    if per_page != 12 or not 1 <= page <= app.config['CATALOG_CACHE_PAGES']:
+        return build()
+    return cached_catalog(('items', page, category or '', sort), build)
+
+def json_response(body, status=200):
+    """Response for JSON text that has already been serialized"""
+    return app.response_class(body + '\n', status=status, mimetype=app.json.mimetype)
 
 # API Routes
 @app.route('/api/categories')
+@read_replica
 def api_categories():
     """Get all categories"""
     try:
-        categories = Category.query.filter_by(is_active=True).all()
-        return jsonify([cat.to_dict() for cat in categories])
+        return json_response(categories_json())
     except Exception as e:
         logger.error(f"Error fetching categories: {e}")
         return jsonify({'error': 'Failed to fetch categories'}), 500
 
 @app.route('/api/items')
+@read_replica
 def api_items():
     """Get items with filtering"""
     try:
@@ -345,66 +1715,14 @@ def api_items():
         search = request.args.get('search')
         sort = request.args.get('sort', 'newest')
         
-        query = Item.query.filter(Item.is_active == True)
-        
-        # Apply filters
-        if category:
-            cat = Category.query.filter_by(slug=category).first()
-            if cat:
-                query = query.filter(Item.category_id == cat.id)
-        
-        if size:
-            query = query.filter(Item.size == size)
-        
-        if min_price:
-            query = query.filter(Item.price_per_day >= min_price * 100)
-        
-        if max_price:
-            query = query.filter(Item.price_per_day <= max_price * 100)
-        
-        if city:
-            query = query.join(User).filter(User.city.ilike(f'%{city}%'))
-        
-        if search:
-            query = query.filter(or_(
-                Item.title.ilike(f"%{search}%"),
-                Item.description.ilike(f"%{search}%")
-            ))
-        
-        # Apply sorting
-        if sort == 'price-low':
-            query = query.order_by(Item.price_per_day.asc())
-        elif sort == 'price-high':
-            query = query.order_by(Item.price_per_day.desc())
-        elif sort == 'name-asc':
-            query = query.order_by(Item.title.asc())
-        elif sort == 'name-desc':
-            query = query.order_by(Item.title.desc())
-        elif sort == 'oldest':
-            query = query.order_by(Item.date_added.asc())
-        else:  # default to newest
-            query = query.order_by(Item.date_added.desc())
-        
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False,
-            max_per_page=100
-        )
-        items = pagination.items
+        if not (size or min_price or max_price or city or search):
+            # Plain catalog browsing is served from the catalog cache
+            return json_response(items_page_json(page=page, per_page=per_page, category=category, sort=sort))
         
-        return jsonify({
-            'items': [item.to_dict() for item in items],
-            'pagination': {
-                'page': pagination.page,
-                'pages': pagination.pages,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        })
+        return jsonify(items_page_payload(
+            page=page, per_page=per_page, category=category, size=size, min_price=min_price,
+            max_price=max_price, city=city, search=search, sort=sort
+        ))
     except Exception as e:
         logger.error(f"Error fetching items: {e}")
         return jsonify({'error': 'Failed to fetch items'}), 500
@@ -651,20 +1969,28 @@ def api_upload_item_images(item_id):
         
         files = request.files.getlist('images')
         uploaded_images = []
+        saved_files = []
+        has_images = bool(item.images)
         
         for i, file in enumerate(files[:5]):  # Limit to 5 images
             if file and file.filename and allowed_file(file.filename):
-                filename = save_image(file)
-                if filename:
+                stored = save_image(file)
+                if stored:
+                    saved_files.append((file, stored['filename']))
                     image = ItemImage(
                         item_id=item.id,
-                        filename=filename,
-                        is_primary=(i == 0 and not item.images)  # First image is primary if no images exist
+                        is_primary=(i == 0 and not has_images),  # First image is primary if no images exist
+                        **stored
                     )
                     db.session.add(image)
-                    uploaded_images.append(filename)
+                    uploaded_images.append(stored['filename'])
         
+        # Files left unreferenced by a failed commit are collected by gc-uploads; deleting
+        # them here could race with another request that is about to reference them
         db.session.commit()
+        for file, filename in saved_files:
+            if not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
+                restore_upload(file, filename)
         
         logger.info(f"Images uploaded for item {item_id}: {len(uploaded_images)} files")
         return jsonify({
@@ -679,10 +2005,12 @@ def api_upload_item_images(item_id):
 
 @app.route('/api/user/items')
 @login_required
+@read_replica
 def api_user_items():
     """Get current user's items"""
     try:
-        items = Item.query.filter_by(owner_id=current_user.id, is_active=True).order_by(Item.date_added.desc()).all()
+        items = Item.query.options(selectinload(Item.images), joinedload(Item.category)) \
+            .filter_by(owner_id=current_user.id, is_active=True).order_by(Item.date_added.desc()).all()
         return jsonify([item.to_dict(include_owner=False) for item in items])
     except Exception as e:
         logger.error(f"Error fetching user items: {e}")
@@ -699,7 +2027,8 @@ def api_delete_item(item_id):
         if item.owner_id != current_user.id:
             return jsonify({'error': 'You can only delete your own items'}), 403
         
-        # Soft delete by setting is_active to False
+        # Soft delete by setting is_active to False. The item's images stay on disk
+        # (rentals still show them); `flask gc-uploads --purge-inactive --delete` collects them
         item.is_active = False
         db.session.commit()
         
@@ -957,8 +2286,52 @@ def api_test():
             'message': str(e)
         })
 
+@app.route('/api/admin/db-pool')
+@admin_token_required
+def api_admin_db_pool():
+    """Connection pool state and counters for this process"""
+    stats = pool_metrics()
+    if 'replica' in db.engines:
+        stats['replica'] = pool_metrics(db.engines['replica'])
+    return jsonify(stats)
+
+@app.route('/api/admin/metrics')
+@admin_token_required
+def prometheus_metrics():
+    """Prometheus scrape endpoint (set metrics_path and a bearer token in the scrape config)"""
+    return app.response_class(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profiling', methods=['GET', 'POST'])
+@admin_token_required
+def api_admin_profiling():
+    """Recent request profiles; POST {"sample_rate": 0.01} changes sampling for this process"""
+    if request.method == 'POST':
+        rate = (request.get_json(silent=True) or {}).get('sample_rate')
+        if not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+            return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+        app.config['PROFILE_SAMPLE_RATE'] = float(rate)
+        logger.info(f"Profile sample rate set to {rate}")
+    return jsonify({
+        'sample_rate': app.config['PROFILE_SAMPLE_RATE'],
+        'keep': app.config['PROFILE_KEEP'],
+        'profiles': list_profiles(request.args.get('endpoint'))[:request.args.get('limit', 20, type=int)],
+    })
+
+@app.route('/api/admin/slow-queries')
+@admin_token_required
+def api_admin_slow_queries():
+    """Per-fingerprint query statistics for this process, with captured plans"""
+    sort = request.args.get('sort', 'total')
+    if sort not in ('total', 'mean', 'p95', 'max', 'count'):
+        return jsonify({'error': 'sort must be total, mean, p95, max or count'}), 400
+    rows = query_stats.snapshot(sort=sort, limit=request.args.get('limit', 50, type=int))
+    if request.args.get('reset'):
+        query_stats.reset()
+    return jsonify({'slow_query_ms': app.config['SLOW_QUERY_MS'], 'queries': rows})
+
 @app.route('/api/search')
 @login_required
+@read_replica
 def api_search():
     """Advanced search with suggestions"""
     try:
@@ -968,7 +2341,7 @@ def api_search():
             return jsonify({'items': [], 'suggestions': []})
         
         # Search items
-        items = Item.query.filter(
+        items = Item.query.options(joinedload(Item.category), joinedload(Item.owner)).filter(
             Item.is_active == True,
             or_(
                 Item.title.ilike(f"%{query}%"),
@@ -1000,11 +2373,68 @@ def api_search():
         logger.error(f"Search error: {e}")
         return jsonify({'error': 'Search failed'}), 500
 
+# Columns added after the initial release; create_all() does not alter existing tables
+SCHEMA_UPGRADES = {
+    'item_images': [
+        ('source_hash', 'VARCHAR(64)'),
+        ('placeholder_color', 'VARCHAR(7)'),
+        ('placeholder', 'TEXT'),
+    ],
+}
+
+SCHEMA_INDEXES = [
+    ('ix_item_images_filename', 'item_images', 'filename'),
+    ('ix_item_images_source_hash', 'item_images', 'source_hash'),
+]
+
+def upgrade_schema():
+    """Add missing columns and indexes to databases created by older versions"""
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, columns in SCHEMA_UPGRADES.items():
+            existing = {col['name'] for col in inspector.get_columns(table)}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+                    logger.info(f"Added column {table}.{name}")
+        for index_name, table, column in SCHEMA_INDEXES:
+            conn.execute(db.text(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})'))
+
+# Demo accounts. Hashes are precomputed (passwords: password123, arjav0302, ankita1001)
+# so initializing a fresh database does not spend seconds in bcrypt.
+DEMO_USERS = [
+    {
+        'name': 'Demo User',
+        'email': 'demo@wearhouse.com',
+        'password_hash': '$2b$12$hwmv2IQ2DIpXocHoPDKspuvx00ulRiBhTrlcqVEjj//jvhzMBM0jG',
+        'phone': '+91 9876543210',
+        'city': 'Mumbai',
+        'address': '123 Fashion Street, Mumbai'
+    },
+    {
+        'name': 'Arjav',
+        'email': 'arjav@rentrobe.com',
+        'password_hash': '$2b$12$Vj9WGW19xZVB0j9pzbDeVePXY5FR7kRG.cyFBVKVO0exDfoQkhvDa',
+        'phone': '+91 8319337033',
+        'city': 'Bhilai',
+        'address': 'Bhilai, Chhattisgarh'
+    },
+    {
+        'name': 'Ankita',
+        'email': 'ankita@rentrobe.com',
+        'password_hash': '$2b$12$ZmZfuU9ijcS2ryozJDROJezJVPBE4Hn1Jtz21LBXqZNV/J8hTUXDa',
+        'phone': '+91 9876543211',
+        'city': 'Delhi',
+        'address': 'Delhi, India'
+    }
+]
+
 # Initialize database and create sample data
 def init_db():
     """Initialize database with sample data"""
     try:
         db.create_all()
+        upgrade_schema()
         
         # Create categories if they don't exist
         categories_data = [
@@ -1016,58 +2446,70 @@ def init_db():
             {'name': 'Designer', 'slug': 'designer', 'icon': '💎'}
         ]
         
+        existing_slugs = {slug for (slug,) in db.session.query(Category.slug)}
         for cat_data in categories_data:
-            if not Category.query.filter_by(slug=cat_data['slug']).first():
+            if cat_data['slug'] not in existing_slugs:
                 category = Category(**cat_data)
                 db.session.add(category)
         
         # Create demo users if they don't exist
-        demo_users = [
-            {
-                'name': 'Demo User',
-                'email': 'demo@wearhouse.com',
-                'password': 'password123',
-                'phone': '+91 9876543210',
-                'city': 'Mumbai',
-                'address': '123 Fashion Street, Mumbai'
-            },
-            {
-                'name': 'Arjav',
-                'email': 'arjav@rentrobe.com',
-                'password': 'arjav0302',
-                'phone': '+91 8319337033',
-                'city': 'Bhilai',
-                'address': 'Bhilai, Chhattisgarh'
-            },
-            {
-                'name': 'Ankita',
-                'email': 'ankita@rentrobe.com',
-                'password': 'ankita1001',
-                'phone': '+91 9876543211',
-                'city': 'Delhi',
-                'address': 'Delhi, India'
-            }
-        ]
-        
-        for user_data in demo_users:
-            if not User.query.filter_by(email=user_data['email']).first():
-                demo_user = User(
-                    name=user_data['name'],
-                    email=user_data['email'],
-                    password_hash=bcrypt.generate_password_hash(user_data['password']).decode('utf-8'),
-                    phone=user_data['phone'],
-                    city=user_data['city'],
-                    address=user_data['address'],
-                    is_verified=True
-                )
-                db.session.add(demo_user)
+        existing_emails = {email for (email,) in db.session.query(User.email).filter(
+            User.email.in_([user_data['email'] for user_data in DEMO_USERS]))}
+        for user_data in DEMO_USERS:
+            if user_data['email'] not in existing_emails:
+                db.session.add(User(**user_data, is_verified=True))
         
         db.session.commit()
         logger.info("Database initialized successfully!")
+        return True
         
     except Exception as e:
         logger.error(f"Database initialization error: {e}")
         db.session.rollback()
+        return False
+
+def schema_fingerprint():
+    """Fingerprint of the expected tables, columns and indexes, small enough for SQLite's user_version"""
+    parts = [f"{table.name}:{','.join(sorted(col.name for col in table.columns))}"
+             for table in sorted(db.metadata.tables.values(), key=lambda t: t.name)]
+    parts.extend(index_name for index_name, _, _ in SCHEMA_INDEXES)
+    return int(hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:7], 16)
+
+def schema_is_current():
+    """True if the SQLite database was initialized by init_db for the current schema"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.connect() as conn:
+        return conn.execute(db.text('PRAGMA user_version')).scalar() == schema_fingerprint()
+
+def stamp_schema():
+    """Record the schema fingerprint so later processes can skip init_db"""
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.begin() as conn:
+            conn.execute(db.text(f'PRAGMA user_version = {schema_fingerprint()}'))
+
+_db_ready = False
+_db_ready_lock = threading.Lock()
+
+def ensure_db():
+    """Initialize the database once per process (e.g. per serverless container).
+    
+    Returns True once the database is ready; after a failed init_db() the
+    next call tries again.
+    """
+    global _db_ready
+    if _db_ready:
+        return True
+    with _db_ready_lock:
+        if _db_ready:
+            return True
+        with app.app_context():
+            if schema_is_current():
+                _db_ready = True
+            elif init_db():
+                stamp_schema()
+                _db_ready = True
+        return _db_ready
 
 def create_sample_data():
     """Create sample items for testing"""
@@ -1140,13 +2582,417 @@ def create_sample_data():
         logger.error(f"Sample data creation error: {e}")
         db.session.rollback()
 
+# Backfill of derivatives for existing uploads
+def backfill_image_worker(task):
+    """Regenerate the placeholder and variants for one stored upload (runs in a worker process)"""
+    from PIL import Image
+    
+    filename, source_path, cache_folder, widths, formats, want_placeholder = task
+    try:
+        stat = os.stat(source_path)
+        placeholder = None
+        if want_placeholder:
+            with Image.open(source_path) as image:
+                placeholder = compute_placeholder(image)
+        
+        variants = 0
+        for fmt in formats:
+            for width in widths:
+                cache_path = os.path.join(cache_folder, variant_cache_key(filename, stat, width, fmt))
+                if os.path.exists(cache_path):
+                    continue
+                data = render_variant(source_path, width, fmt)
+                tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, cache_path)
+                variants += 1
+        return filename, placeholder, variants, None
+    except Exception as e:
+        return filename, None, 0, str(e)
+
+def load_backfill_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'last_id': 0, 'processed': 0, 'failed_ids': []}
+
+def save_backfill_checkpoint(path, checkpoint):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def backfill_images(chunk_size=200, workers=None, widths=None, formats=('jpeg', 'webp'),
+                    force=False, restart=False):
+    """Regenerate placeholders and image variants for existing ItemImage rows.
+    
+    Rows are walked in id order, one chunk at a time; each chunk is fanned out
+    over a process pool and the last finished id is checkpointed so an
+    interrupted run picks up where it stopped. Rows whose file failed to render
+    are kept in the checkpoint's failed_ids and retried by the next run.
+    """
+    if not PIL_AVAILABLE:
+        logger.error("PIL not available - cannot backfill images")
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    
+    checkpoint_path = app.config['BACKFILL_CHECKPOINT']
+    checkpoint = {'last_id': 0, 'processed': 0} if restart else load_backfill_checkpoint(checkpoint_path)
+    retry_ids = set(checkpoint.get('failed_ids', []))  # failures from an earlier run
+    failed_ids = set()
+    if checkpoint['last_id']:
+        logger.info(f"Resuming backfill after image id {checkpoint['last_id']}, "
+                    f"retrying {len(retry_ids)} failed images")
+    
+    def pending():
+        return ItemImage.query.filter(or_(ItemImage.id > checkpoint['last_id'],
+                                          ItemImage.id.in_(retry_ids)))
+    
+    widths = widths or app.config['IMAGE_VARIANT_WIDTHS']
+    total = pending().count()
+    rows_done = skipped = files = failed = variants = 0
+    start = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            rows = pending().order_by(ItemImage.id).limit(chunk_size).all()
+            if not rows:
+                break
+            
+            # Deduplicated uploads share a file, so process each filename once per chunk
+            by_filename = {}
+            for row in rows:
+                source_path = safe_join(app.config['UPLOAD_FOLDER'], row.filename)
+                if source_path and os.path.isfile(source_path):
+                    by_filename.setdefault(row.filename, (source_path, []))[1].append(row)
+                else:
+                    skipped += 1  # remote URL or missing file: nothing to render
+            
+            tasks = [
+                (filename, source_path, app.config['IMAGE_CACHE_FOLDER'], widths, formats,
+                 force or any(row.placeholder is None for row in chunk_rows))
+                for filename, (source_path, chunk_rows) in by_filename.items()
+            ]
+            for filename, placeholder, count, error in pool.map(backfill_image_worker, tasks):
+                if error:
+                    failed += 1
+                    failed_ids.update(row.id for row in by_filename[filename][1])
+                    logger.warning(f"Backfill failed for {filename}: {error}")
+                    continue
+                files += 1
+                variants += count
+                if placeholder:
+                    for row in by_filename[filename][1]:
+                        row.placeholder_color = placeholder['placeholder_color']
+                        row.placeholder = placeholder['placeholder']
+            
+            db.session.commit()
+            rows_done += len(rows)
+            retry_ids.difference_update(row.id for row in rows)
+            checkpoint = {
+                'last_id': max(checkpoint['last_id'], rows[-1].id),
+                'processed': checkpoint['processed'] + len(rows),
+                'failed_ids': sorted(retry_ids | failed_ids),
+            }
+            save_backfill_checkpoint(checkpoint_path, checkpoint)
+            
+            elapsed = time.perf_counter() - start
+            logger.info(f"Backfill: {rows_done}/{total} rows, {files} files, {skipped} skipped, "
+                        f"{variants} variants, {files / elapsed:.1f} files/s")
+    
+    # Variants were written behind the cache's back; rescan and trim
+    with _image_cache_lock:
+        _image_cache_stats['bytes'] = None
+    evict_image_cache()
+    
+    elapsed = time.perf_counter() - start
+    rate = files / elapsed if elapsed else 0.0
+    print(f"Backfilled {files} files for {rows_done} rows ({skipped} rows skipped without a local file, "
+          f"{failed} failed, {variants} variants) in {elapsed:.1f}s - {rate:.1f} files/s")
+    if checkpoint.get('failed_ids'):
+        print(f"{len(checkpoint['failed_ids'])} images failed and will be retried on the next run")
+    elif os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)  # finished, next run starts over
+    return {'rows': rows_done, 'processed': files, 'skipped': skipped, 'failed': failed,
+            'failed_ids': checkpoint.get('failed_ids', []), 'variants': variants,
+            'files_per_second': rate}
+
+# Orphaned upload garbage collection
+def iter_sorted_upload_names(folder, run_size, work_dir):
+    """Yield upload filenames in sorted order without holding the whole listing.
+    
+    os.scandir returns entries in directory order, so names are collected in
+    runs of run_size, each run is sorted and spilled to disk, and the runs
+    are merged back into one sorted stream.
+    """
+    runs = []
+    batch = []
+    
+    def spill(names):
+        path = os.path.join(work_dir, f'run-{len(runs)}.txt')
+        with open(path, 'w') as f:
+            f.writelines(name + '\n' for name in sorted(names))
+        runs.append(path)
+    
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                batch.append(entry.name)
+                if len(batch) >= run_size:
+                    spill(batch)
+                    batch = []
+    
+    if not runs:
+        yield from sorted(batch)
+        return
+    if batch:
+        spill(batch)
+    
+    files = [open(path) for path in runs]
+    try:
+        yield from heapq.merge(*[(line.rstrip('\n') for line in f) for f in files])
+    finally:
+        for f in files:
+            f.close()
+
+def iter_referenced_filenames(batch_size, include_inactive=True):
+    """Yield distinct ItemImage filenames in sorted order using keyset pagination"""
+    column = ItemImage.filename
+    if db.engine.dialect.name == 'postgresql':
+        column = column.collate('C')  # byte order, to match Python string comparison
+    
+    last = None
+    while True:
+        query = db.session.query(ItemImage.filename).distinct()
+        if not include_inactive:
+            query = query.join(Item).filter(Item.is_active == True)
+        if last is not None:
+            query = query.filter(column > last)
+        batch = [row[0] for row in query.order_by(column).limit(batch_size)]
+        if not batch:
+            return
+        yield from batch
+        last = batch[-1]
+
+def gc_uploads(dry_run=True, min_age_hours=24, batch_size=10000, include_inactive=True):
+    """Find (and unless dry_run, delete) upload files no ItemImage row references.
+    
+    This is the only place uploads are deleted. Files younger than
+    min_age_hours are kept so uploads whose rows are not committed yet are
+    never collected (and the upload route restores an older file it reused
+    if it was collected anyway). Soft-deleted items keep their images; with
+    include_inactive=False, files only they reference count as orphans too.
+    """
+    folder = app.config['UPLOAD_FOLDER']
+    cutoff = time.time() - min_age_hours * 3600
+    stats = {'scanned': 0, 'orphans': 0, 'bytes': 0, 'too_new': 0, 'deleted': 0}
+    
+    with tempfile.TemporaryDirectory(prefix='rentrobe-gc-') as work_dir:
+        references = iter_referenced_filenames(batch_size, include_inactive=include_inactive)
+        reference = next(references, None)
+        
+        for name in iter_sorted_upload_names(folder, batch_size, work_dir):
+            stats['scanned'] += 1
+            while reference is not None and reference < name:
+                reference = next(references, None)
+            if reference == name:
+                continue
+            
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > cutoff:
+                stats['too_new'] += 1
+                continue
+            
+            stats['orphans'] += 1
+            stats['bytes'] += stat.st_size
+            if dry_run:
+                logger.info(f"Orphaned upload: {name} ({stat.st_size} bytes)")
+                continue
+            try:
+                os.remove(path)
+                stats['deleted'] += 1
+            except FileNotFoundError:
+                pass
+    
+    return stats
+
 # SPA routes - must be after all API routes
 @app.route('/<path:path>')
 def spa_routes(path):
     """Single Page Application routes"""
-    return render_template('index.html')
+    return spa_shell_response()
 
 # CLI Commands
+def print_query_stats(rows):
+    print(f"{'count':>7} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'slow':>5}  fingerprint")
+    for row in rows:
+        print(f"{row['count']:>7} {row['total_ms']:>10.1f} {row['mean_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+              f"{row['slow_count']:>5}  {row['fingerprint'][:160]}")
+        if row['plan']:
+            if row['example']:
+                print(f"{'':>44}  first slow: {row['example']['ms']}ms from {row['example']['endpoint']} "
+                      f"?{row['example']['query_string'] or ''}")
+            for line in row['plan']:
+                print(f"{'':>44}  plan: {line}")
+
+@app.cli.command('slow-queries')
+@click.option('--url', default='http://localhost:5000', show_default=True, help='Running app to read from')
+@click.option('--sort', type=click.Choice(['total', 'mean', 'p95', 'max', 'count']), default='total', show_default=True)
+@click.option('--limit', default=20, show_default=True)
+@click.option('--json', 'as_json', is_flag=True, help='Print the raw JSON')
+@click.option('--reset', is_flag=True, help='Clear the table after reading it')
+def slow_queries_command(url, sort, limit, as_json, reset):
+    """Dump per-fingerprint query statistics from a running app (needs ADMIN_TOKEN)"""
+    query = f'sort={sort}&limit={limit}' + ('&reset=1' if reset else '')
+    req = Request(f"{url.rstrip('/')}/api/admin/slow-queries?{query}",
+                  headers={'X-Admin-Token': app.config['ADMIN_TOKEN'] or ''})
+    with urlopen(req, timeout=10) as resp:
+        rows = json.load(resp)['queries']
+    if as_json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_query_stats(rows)
+
+@app.cli.command('profiles')
+@click.option('--endpoint', help='Only captures of this endpoint, e.g. api_items')
+@click.option('--show', 'show_ids', multiple=True, help='Summarize these capture ids (repeatable)')
+@click.option('--summary', is_flag=True, help='Summarize all listed captures, merged')
+@click.option('--sort', type=click.Choice(['cumulative', 'tottime', 'calls']), default='cumulative',
+              show_default=True)
+@click.option('--limit', default=30, show_default=True, help='Rows to print')
+def profiles_command(endpoint, show_ids, summary, sort, limit):
+    """List captured request profiles, or print merged pstats for some of them"""
+    import pstats
+    
+    profiles = list_profiles(endpoint)
+    if show_ids:
+        profiles = [meta for meta in profiles if meta['id'] in show_ids]
+        missing = set(show_ids) - {meta['id'] for meta in profiles}
+        if missing:
+            raise click.ClickException(f"No such profile: {', '.join(sorted(missing))}")
+    if not profiles:
+        print(f"No profiles in {app.config['PROFILE_FOLDER']}")
+        return
+    
+    if not (show_ids or summary):
+        print(f"{'id':<48} {'status':>6} {'ms':>9} {'trigger':<9} request")
+        for meta in profiles[:limit]:
+            query = f"?{meta['query_string']}" if meta['query_string'] else ''
+            print(f"{meta['id']:<48} {meta['status']:>6} {meta['duration_ms']:>9.1f} {meta['trigger']:<9} "
+                  f"{meta['method']} {meta['path']}{query}")
+        return
+    
+    folder = Path(app.config['PROFILE_FOLDER'])
+    for meta in profiles:
+        query = f"?{meta['query_string']}" if meta['query_string'] else ''
+        print(f"{meta['id']}: {meta['method']} {meta['path']}{query} -> {meta['status']} in {meta['duration_ms']}ms")
+    stats = pstats.Stats(*(str(folder / f"{meta['id']}.prof") for meta in profiles))
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+
+# SQLite replica refresh
+def sync_sqlite_replica():
+    """Copy the primary SQLite database into the replica file with SQLite's online backup.
+    
+    The copy is transactionally consistent and readers of the replica keep
+    working while it runs. Returns the replica path.
+    """
+    primary = db.engine
+    replica = db.engines.get('replica')
+    if replica is None:
+        raise RuntimeError("DATABASE_REPLICA_URL is not set")
+    if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise RuntimeError("sync-replica only copies SQLite files; server replicas use the database's own replication")
+    
+    source = sqlite3.connect(primary.url.database)
+    target = sqlite3.connect(replica.url.database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return replica.url.database
+
+@app.cli.command('sync-replica')
+@click.option('--interval', type=float, default=0, help='Keep running, syncing every N seconds')
+def sync_replica_command(interval):
+    """Refresh the SQLite read replica from the primary database"""
+    while True:
+        start = time.perf_counter()
+        path = sync_sqlite_replica()
+        print(f"Synced replica {path} in {(time.perf_counter() - start) * 1000:.0f}ms")
+        if not interval:
+            break
+        time.sleep(interval)
+
+# Import-time profiling
+def profile_imports(module='app'):
+    """Import `module` in a fresh interpreter under `-X importtime`.
+    
+    Returns (name, self_us, cumulative_us, depth) tuples in the order the
+    interpreter reports them (children before their parent).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=app.root_path, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def module_import_us(entries, module):
+    """Cumulative import time of the top-level `module` in a profile_imports() result"""
+    return next(cumulative for name, _, cumulative, depth in entries if name == module and depth == 0)
+
+def import_time_ms(module='app', runs=3):
+    """Best-of-`runs` cumulative import time of `module`, in milliseconds"""
+    return min(module_import_us(profile_imports(module), module) for _ in range(runs)) / 1000
+
+@app.cli.command('import-profile')
+@click.option('--module', default='app', show_default=True, help='Module to import')
+@click.option('--top', default=15, show_default=True, help='Rows per table')
+@click.option('--check', is_flag=True, help='Exit non-zero if the import exceeds IMPORT_BUDGET_MS')
+def import_profile_command(module, top, check):
+    """Summarize `python -X importtime` for a cold import of the app"""
+    entries = profile_imports(module)
+    total = module_import_us(entries, module)
+    budget = app.config['IMPORT_BUDGET_MS']
+    print(f"import {module}: {total / 1000:.1f}ms (budget {budget}ms)")
+    
+    # Entries directly under the module are what it imports itself
+    direct, index = [], len(entries) - 1
+    while entries[index][0] != module or entries[index][3] != 0:
+        index -= 1
+    for name, _, cumulative, depth in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((cumulative, name))
+    print(f"\nSlowest imports made by {module} (cumulative):")
+    for cumulative, name in sorted(direct, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+    
+    packages = {}
+    for name, self_us, _, _ in entries:
+        packages[name.split('.')[0]] = packages.get(name.split('.')[0], 0) + self_us
+    print("\nPackages by self time:")
+    for package, self_us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f}ms  {package}")
+    
+    if check and total / 1000 > budget:
+        raise SystemExit(f"import {module} took {total / 1000:.1f}ms, over the {budget}ms budget")
+
 @app.cli.command()
 def init_database():
     """Initialize database with sample data"""
@@ -1157,6 +3003,34 @@ def create_samples():
     """Create sample items for testing"""
     create_sample_data()
 
+@app.cli.command('backfill-images')
+@click.option('--chunk-size', default=200, show_default=True, help='ItemImage rows per chunk')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+@click.option('--width', 'widths', type=int, multiple=True, help='Variant widths (default: IMAGE_VARIANT_WIDTHS)')
+@click.option('--format', 'formats', multiple=True, default=('jpeg', 'webp'), show_default=True,
+              type=click.Choice(list(IMAGE_VARIANT_FORMATS)))
+@click.option('--force', is_flag=True, help='Recompute placeholders that already exist')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first image')
+def backfill_images_command(chunk_size, workers, widths, formats, force, restart):
+    """Regenerate placeholders and variants for existing uploads"""
+    backfill_images(chunk_size=chunk_size, workers=workers, widths=list(widths) or None,
+                    formats=formats, force=force, restart=restart)
+
+@app.cli.command('gc-uploads')
+@click.option('--delete', is_flag=True, help='Delete orphaned files (default: only report them)')
+@click.option('--min-age-hours', default=24.0, show_default=True, help='Never collect files newer than this')
+@click.option('--batch-size', default=10000, show_default=True, help='Names per sorted run / DB page')
+@click.option('--purge-inactive', is_flag=True, help='Treat images of soft-deleted items as orphaned')
+def gc_uploads_command(delete, min_age_hours, batch_size, purge_inactive):
+    """Report, and with --delete remove, upload files that no ItemImage references"""
+    dry_run = not delete
+    stats = gc_uploads(dry_run=dry_run, min_age_hours=min_age_hours, batch_size=batch_size,
+                       include_inactive=not purge_inactive)
+    action = 'would delete' if dry_run else 'deleted'
+    print(f"Scanned {stats['scanned']} files: {stats['orphans']} orphaned "
+          f"({stats['bytes'] / (1024 * 1024):.1f}MB), {action} {stats['orphans'] if dry_run else stats['deleted']}, "
+          f"{stats['too_new']} skipped as too new")
+
 @app.cli.command()
 def create_admin():
     """Create an admin user"""
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Measure cold and warm invocation latency of the Netlify API function locally
+"""
+
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+FUNCTION_DIR = project_root / 'netlify' / 'functions'
+EVENT = {
+    'path': '/api/categories',
+    'httpMethod': 'GET',
+    'headers': {'Accept': 'application/json'},
+    'queryStringParameters': {},
+    'body': '',
+}
+# Filtered listings bypass the catalog cache, so every call reaches the database
+CATALOG_EVENT = {
+    'path': '/api/items',
+    'httpMethod': 'GET',
+    'headers': {'Accept': 'application/json'},
+    'rawQuery': 'search=dress&sort=price-low',
+    'body': '',
+}
+
+# Runs in a fresh interpreter: one cold start followed by warm invocations
+INVOKE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {function_dir!r})
+import api
+imported = time.perf_counter()
+event = json.loads({event!r})
+status = api.handler(event, None)['statusCode']
+first = time.perf_counter()
+warm = []
+for _ in range({warm_count}):
+    t = time.perf_counter()
+    api.handler(event, None)
+    warm.append(time.perf_counter() - t)
+init = None
+if {measure_init}:
+    from app import app, init_db
+    with app.app_context():
+        t = time.perf_counter()
+        init_db()
+        init = time.perf_counter() - t
+print(json.dumps({{'import': imported - start, 'first': first - imported, 'warm': warm,
+                  'status': status, 'init_db': init}}))
+"""
+
+def invoke(db_file, warm_count=0, measure_init=False, event=EVENT, db_mode=None):
+    """Start a new interpreter against db_file and return its timings.
+    
+    With db_mode, the function opens db_file itself as a bundled database in that FUNCTION_DB_MODE.
+    """
+    script = INVOKE_SCRIPT.format(function_dir=str(FUNCTION_DIR), event=json.dumps(event),
+                                  warm_count=warm_count, measure_init=measure_init)
+    env = {**os.environ, 'SECRET_KEY': 'bench-secret-key'}
+    if db_mode:
+        env.pop('DATABASE_URL', None)
+        # A private temp dir per run: every run is a new container and pays for the copy
+        env.update({'FUNCTION_DB_PATH': str(db_file), 'FUNCTION_DB_MODE': db_mode,
+                    'TMPDIR': tempfile.mkdtemp(dir=db_file.parent)})
+    else:
+        env['DATABASE_URL'] = f'sqlite:///{db_file}'
+    result = subprocess.run([sys.executable, '-c', script], env=env, cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def ms(seconds):
+    return f"{seconds * 1000:8.1f}ms"
+
+def benchmark(cold_runs=5, warm_count=200):
+    tmp_dir = Path(tempfile.mkdtemp(prefix='rentrobe-bench-'))
+    source_db = project_root / 'instance' / 'wearhouse.db'
+
+    # An unstamped copy makes the first cold start run init_db; it stamps the file for later runs
+    db_file = tmp_dir / 'function.db'
+    if source_db.exists():
+        shutil.copy(source_db, db_file)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute('PRAGMA user_version = 0')
+    print(f"{'case':<28} {'import':>10} {'first call':>10}")
+    for label in ('cold, unstamped db', 'cold, stamped db'):
+        run = invoke(db_file)
+        print(f"{label:<28} {ms(run['import'])} {ms(run['first'])}")
+
+    # Repeated cold starts against the stamped database, as shipped by the build
+    colds = [invoke(db_file) for _ in range(cold_runs)]
+    print(f"{'cold median (n=%d)' % cold_runs:<28} "
+          f"{ms(statistics.median(r['import'] for r in colds))} "
+          f"{ms(statistics.median(r['first'] for r in colds))}")
+
+    run = invoke(db_file, warm_count=warm_count, measure_init=True)
+    warm = sorted(run['warm'])
+    print(f"\nwarm invocations (n={warm_count}, status {run['status']})")
+    print(f"  p50 {ms(warm[len(warm) // 2])}  p95 {ms(warm[int(len(warm) * 0.95)])}  max {ms(warm[-1])}")
+    print(f"  init_db (previously paid on every call): {ms(run['init_db'])}")
+
+    print(f"\ncatalog query by FUNCTION_DB_MODE (n={warm_count})")
+    print(f"{'mode':<12} {'import':>10} {'first call':>10} {'warm p50':>10} {'warm p95':>10}")
+    for mode in ('bundled', 'immutable', 'copy'):
+        run = invoke(db_file, warm_count=warm_count, event=CATALOG_EVENT, db_mode=mode)
+        warm = sorted(run['warm'])
+        print(f"{mode:<12} {ms(run['import'])} {ms(run['first'])} "
+              f"{ms(warm[len(warm) // 2])} {ms(warm[int(len(warm) * 0.95)])}")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request overhead of the Netlify function handler over calling the WSGI app directly
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'netlify' / 'functions'))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-bench-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'bench.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/bench.db'
+os.environ['SECRET_KEY'] = 'bench-secret-key'
+
+# Import the function (and through it the Flask app)
+import api
+from app import app
+
+def legacy_handler(event):
+    """The previous bridge: test_request_context plus a JSON decode/encode of the body"""
+    query_string = '&'.join(f"{k}={v}" for k, v in (event.get('queryStringParameters') or {}).items())
+    with app.test_request_context(path=event['path'], method=event['httpMethod'],
+                                  headers=event.get('headers') or {}, data=event.get('body') or '',
+                                  query_string=query_string):
+        response = app.full_dispatch_request()
+        response_data = response.get_data(as_text=True)
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            response_data = json.loads(response_data)
+        return {'statusCode': response.status_code, 'headers': dict(response.headers),
+                'body': json.dumps(response_data)}
+
+def time_calls(fn, requests_count, repeat=3):
+    """Best of `repeat` runs, in microseconds per request"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(requests_count):
+            fn()
+        elapsed = (time.perf_counter() - start) / requests_count * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark(requests_count=1000):
+    uploads = sorted(os.listdir(app.config['UPLOAD_FOLDER'])) if os.path.isdir(app.config['UPLOAD_FOLDER']) else []
+    events = [
+        ('categories', {'path': '/api/categories', 'httpMethod': 'GET', 'headers': {}}),
+        ('items page', {'path': '/api/items', 'httpMethod': 'GET', 'headers': {},
+                        'queryStringParameters': {'page': '1', 'per_page': '12'}}),
+    ]
+    if uploads:
+        events.append(('binary upload', {'path': f'/static/uploads/{uploads[0]}', 'httpMethod': 'GET',
+                                         'headers': {}}))
+
+    print(f"{requests_count} requests per case (best of 3), microseconds per request")
+    print(f"{'endpoint':<16} {'wsgi direct':>12} {'handler':>12} {'overhead':>10} {'legacy':>12}")
+    for name, event in events:
+        environ = api.build_environ(event)
+        direct = time_calls(lambda: api.call_app(dict(environ)), requests_count)
+        bridged = time_calls(lambda: api.handler(event, None), requests_count)
+        try:
+            legacy = f"{time_calls(lambda: legacy_handler(event), requests_count):>12.0f}"
+        except Exception as e:
+            legacy = f"{'fails (' + type(e).__name__ + ')':>12}"
+        print(f"{name:<16} {direct:>12.0f} {bridged:>12.0f} {bridged - direct:>10.0f} {legacy}")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark()
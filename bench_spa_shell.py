@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark SPA shell serving: render_template vs precomputed bytes
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-bench-')
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/bench.db'
+os.environ['SECRET_KEY'] = 'bench-secret-key'
+
+# Import the Flask app
+from flask import render_template
+from app import app, init_db
+
+# Baseline: what index/spa_routes did before the shell was cached
+@app.route('/__bench/render-template')
+def bench_render_template():
+    return render_template('index.html')
+
+def run(client, url, headers, requests_count):
+    """Issue requests and return (requests/sec, bytes per response, status code)"""
+    size = 0
+    status = None
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        response = client.get(url, headers=headers)
+        size = len(response.get_data())
+        status = response.status_code
+    elapsed = time.perf_counter() - start
+    return requests_count / elapsed, size, status
+
+def benchmark(requests_count=2000):
+    print(f"{requests_count} requests per case")
+    print(f"{'case':<28} {'status':>6} {'req/s':>10} {'bytes':>10}")
+
+    with app.app_context():
+        init_db()
+
+    with app.test_client() as client:
+        cases = [
+            ('render_template', '/__bench/render-template', {}),
+            ('cached bytes', '/', {}),
+            ('cached bytes, gzip', '/', {'Accept-Encoding': 'gzip'}),
+            ('cached bytes, 304', '/', {'Accept-Encoding': 'gzip'}),
+            ('spa route, gzip', '/browse', {'Accept-Encoding': 'gzip'}),
+        ]
+        for bootstrap in (False, True):
+            app.config['SPA_BOOTSTRAP'] = bootstrap
+            print(f"-- SPA_BOOTSTRAP={bootstrap}")
+            for name, url, headers in cases:
+                if name.endswith('304'):
+                    headers = {**headers, 'If-None-Match': client.get(url, headers=headers).headers['ETag']}
+                rps, size, status = run(client, url, headers, requests_count)
+                print(f"{name:<28} {status:>6} {rps:>10.0f} {size:>10}")
+
+if __name__ == "__main__":
+    benchmark()
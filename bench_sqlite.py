@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed read/write throughput under concurrent threads for each SQLite profile
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-bench-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'bench.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/bench.db'
+os.environ['SECRET_KEY'] = 'bench-secret-key'
+
+# Import the Flask app
+from app import app, db, init_db, Item, SQLITE_PROFILES
+
+def reader(stop, counts):
+    """Catalog listing: the query behind an uncached /api/items page"""
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                items = Item.query.filter(Item.is_active == True) \
+                    .order_by(Item.price_per_day).limit(12).all()
+                [item.to_dict() for item in items]
+                counts['reads'] += 1
+            except Exception:
+                db.session.rollback()
+                counts['errors'] += 1
+            finally:
+                db.session.remove()
+
+def writer(stop, counts, item_ids):
+    """View counter increments, one transaction each"""
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                Item.query.filter_by(id=random.choice(item_ids)).update({Item.views: Item.views + 1})
+                db.session.commit()
+                counts['writes'] += 1
+            except Exception:
+                db.session.rollback()
+                counts['errors'] += 1
+            finally:
+                db.session.remove()
+
+def run(readers, writers, duration, item_ids):
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}  # approximate under the GIL; fine for a benchmark
+    stop = threading.Event()
+    threads = [threading.Thread(target=reader, args=(stop, counts)) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(stop, counts, item_ids)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {key: value / duration for key, value in counts.items()}
+
+def benchmark(duration=3.0, mixes=((8, 0), (8, 1), (8, 4), (2, 4))):
+    with app.app_context():
+        init_db()
+        item_ids = [item_id for (item_id,) in db.session.query(Item.id)] or [1]
+
+    print(f"{duration:.0f}s per case, operations per second")
+    print(f"{'profile':<10} {'readers':>7} {'writers':>7} {'reads/s':>10} {'writes/s':>10} {'errors/s':>10}")
+    for profile in SQLITE_PROFILES:
+        if profile == 'none':
+            continue
+        app.config['SQLITE_PROFILE'] = profile
+        with app.app_context():
+            db.engine.dispose()  # new connections pick up the profile
+        for readers, writers in mixes:
+            rates = run(readers, writers, duration, item_ids)
+            print(f"{profile:<10} {readers:>7} {writers:>7} {rates['reads']:>10.0f} "
+                  f"{rates['writes']:>10.0f} {rates['errors']:>10.1f}")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark()
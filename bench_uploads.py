@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark upload serving throughput for each UPLOAD_SERVE_MODE
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-bench-')
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/bench.db'
+os.environ['SECRET_KEY'] = 'bench-secret-key'
+
+# Import the Flask app
+from app import app, content_addressed_name
+
+def make_upload(size):
+    """Write a random upload of the given size and return its filename"""
+    data = os.urandom(size)
+    filename = content_addressed_name(data, 'jpg')
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], filename), 'wb') as f:
+        f.write(data)
+    return filename
+
+def run(client, url, headers, requests_count):
+    """Issue requests and return (requests/sec, MB/sec, status code)"""
+    transferred = 0
+    status = None
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        response = client.get(url, headers=headers)
+        transferred += len(response.get_data())
+        status = response.status_code
+        response.close()
+    elapsed = time.perf_counter() - start
+    return requests_count / elapsed, transferred / elapsed / (1024 * 1024), status
+
+def benchmark(size=512 * 1024, requests_count=500):
+    app.config['UPLOAD_FOLDER'] = tmp_dir
+    filename = make_upload(size)
+    url = f'/static/uploads/{filename}'
+
+    print(f"Serving a {size // 1024}KB upload, {requests_count} requests per case")
+    print(f"{'mode':<12} {'case':<12} {'status':>6} {'req/s':>10} {'MB/s':>10}")
+
+    with app.test_client() as client:
+        cases = [
+            ('full', {}),
+            ('range', {'Range': 'bytes=0-65535'}),
+            ('304', None),
+        ]
+        for mode in ('direct', 'x-accel', 'x-sendfile'):
+            app.config['UPLOAD_SERVE_MODE'] = mode
+            for name, headers in cases:
+                if mode != 'direct' and name == 'range':
+                    continue  # Range requests are answered by the proxy
+                if headers is None:
+                    # ETags differ between modes, so revalidate against this mode's tag
+                    headers = {'If-None-Match': client.get(url).headers.get('ETag')}
+                rps, mbps, status = run(client, url, headers, requests_count)
+                print(f"{mode:<12} {name:<12} {status:>6} {rps:>10.0f} {mbps:>10.1f}")
+
+if __name__ == "__main__":
+    benchmark()
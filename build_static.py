@@ -5,87 +5,568 @@ Creates static files and prepares the site for deployment
 """
 
 import os
+import re
+import gzip
+import json
 import shutil
 import sys
+import hashlib
+import argparse
+import zipfile
+import sqlite3
+from html import escape
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def build_static_site():
-    """Build static site for Netlify deployment"""
+# Optional brotli support for .br siblings
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.map', '.ico'}
+MIN_COMPRESS_SIZE = 1024  # smaller files are not worth an extra request header
+
+MANIFEST_NAME = 'asset-manifest.json'
+DEPLOY_ZIP = Path('rentrobe-deploy.zip')
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)  # fixed so identical inputs give an identical zip
+IGNORED_NAMES = {'__pycache__', '.DS_Store'}
+
+# Catalog snapshots: /api/items query parameters, their defaults and the sorts the API knows
+SNAPSHOT_SORTS = ['newest', 'oldest', 'price-low', 'price-high', 'name-asc', 'name-desc']
+SNAPSHOT_PER_PAGE = 12
+FILTER_PARAMS = ['search', 'size', 'min_price', 'max_price', 'city']
+
+INLINE_STYLE_RE = re.compile(r'<style>(.*?)</style>', re.S)
+INLINE_SCRIPT_RE = re.compile(r'<script>(.*?)</script>', re.S)
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """Conservative line-based minification: drop indentation, blank lines and
+    whole-line // comments, but leave anything inside template literals alone"""
+    lines = []
+    in_template = False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if not in_template and (not stripped or stripped.startswith('//')):
+            continue
+        lines.append(line if in_template else stripped)
+        backticks = len(re.findall(r'(?<!\\)`', line))
+        if backticks % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+def minify_html(html):
+    """Drop indentation and blank lines from markup (the shell has no <pre> blocks)"""
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip()) + '\n'
+
+def hashed_asset_name(content, name, extension):
+    """Return <name>.<hash>.<extension> for content"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    return f"{name}.{digest}.{extension}"
+
+def extract_inline_assets(html, url_prefix='/static/assets/'):
+    """Move inline <style> and <script> blocks into content-hashed files.
+    
+    Returns the rewritten HTML and a {filename: content} dict of assets. Each
+    block is replaced in place so styles and scripts still apply in their
+    original order.
+    """
+    assets = {}
+    
+    def replace_style(match):
+        content = minify_css(match.group(1))
+        filename = hashed_asset_name(content, 'app', 'css')
+        assets[filename] = content
+        return f'<link rel="stylesheet" href="{url_prefix}{filename}">'
+    
+    def replace_script(match):
+        content = minify_js(match.group(1))
+        filename = hashed_asset_name(content, 'app', 'js')
+        assets[filename] = content
+        return f'<script src="{url_prefix}{filename}"></script>'
+    
+    html = INLINE_STYLE_RE.sub(replace_style, html)
+    html = INLINE_SCRIPT_RE.sub(replace_script, html)
+    return minify_html(html), assets
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def iter_tree(src):
+    """Files under src in sorted order, skipping caches"""
+    for path in sorted(src.rglob('*')):
+        if path.is_file() and not IGNORED_NAMES.intersection(path.parts) and path.suffix != '.pyc':
+            yield path
+
+def is_compressible(rel):
+    return Path(rel).suffix in COMPRESSIBLE_EXTENSIONS and not rel.startswith('netlify/')
+
+def compress_file(path):
+    """Write .gz (and .br when available) siblings for one file; return their sizes"""
+    data = path.read_bytes()
+    sizes = {}
+    for encoding, suffix, compress in (
+        ('gzip_size', '.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0)),
+        ('br_size', '.br', (lambda d: brotli.compress(d, quality=11)) if BROTLI_AVAILABLE else None),
+    ):
+        sibling = Path(f"{path}{suffix}")
+        compressed = compress(data) if compress and len(data) >= MIN_COMPRESS_SIZE else None
+        if compressed is not None and len(compressed) < len(data):
+            sibling.write_bytes(compressed)
+            sizes[encoding] = len(compressed)
+        elif sibling.exists():
+            sibling.unlink()  # left over from an earlier version of the file
+    return sizes
+
+def precompress_assets(dist_dir, rel_paths, manifest, workers=None):
+    """Precompress the given dist/ files across all cores and record sizes in the manifest"""
+    rel_paths = [rel for rel in rel_paths if is_compressible(rel)]
+    if rel_paths:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compress_file, [dist_dir / rel for rel in rel_paths], chunksize=16))
+        for rel, sizes in zip(rel_paths, results):
+            entry = manifest[rel]
+            entry.pop('gzip_size', None)
+            entry.pop('br_size', None)
+            entry.update(sizes)
+    
+    compressed = [entry for entry in manifest.values() if 'gzip_size' in entry]
+    original = sum(entry['size'] for entry in compressed)
+    total = sum(entry['gzip_size'] for entry in compressed)
+    print(f"[OK] Precompressed {len(rel_paths)} changed assets; {len(compressed)} total "
+          f"({original // 1024}KB -> {total // 1024}KB gzip)" + (" with brotli" if BROTLI_AVAILABLE else ""))
+
+def load_manifest(dist_dir):
+    try:
+        with open(dist_dir / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def deploy_files(manifest):
+    """Every file a deploy needs: the manifest's files, their precompressed siblings and the manifest"""
+    files = {MANIFEST_NAME}
+    for rel, entry in manifest.items():
+        files.add(rel)
+        if 'gzip_size' in entry:
+            files.add(rel + '.gz')
+        if 'br_size' in entry:
+            files.add(rel + '.br')
+    return sorted(files)
+
+def write_deploy_zip(dist_dir, manifest, zip_path=DEPLOY_ZIP):
+    """Write a byte-for-byte reproducible zip of everything deploy_files() lists"""
+    tmp_path = zip_path.with_suffix('.zip.tmp')
+    files = deploy_files(manifest)
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for rel in files:
+            info = zipfile.ZipInfo(rel, date_time=ZIP_TIMESTAMP)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            info.create_system = 3  # unix, so external_attr is honoured everywhere
+            with open(dist_dir / rel, 'rb') as src, archive.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, zip_path)
+    print(f"[OK] Wrote {zip_path} ({len(files)} files)")
+
+def initialize_database():
+    """Bring instance/wearhouse.db up to the current schema and stamp it.
+    
+    The copy shipped next to the function then skips init_db on cold start.
+    """
+    from app import ensure_db
+    
+    ensure_db()
+    print("[OK] Database initialized for the function bundle")
+
+def checkpoint_database():
+    """Fold any WAL contents back into the database file and leave it in rollback-journal mode.
+    
+    The app opens SQLite in WAL mode; the copies shipped in dist/ must be complete
+    without their -wal sidecar.
+    """
+    from app import app, db
+    
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return
+        path = db.engine.url.database
+        db.engine.dispose()
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
+
+def render_catalog_snapshots(out, pages=3):
+    """Pre-render public, read-mostly API responses into dist/snapshots/.
+    
+    Writes /api/categories, the first `pages` pages of /api/items for every
+    sort and category, and one JSON file per active item. Returns the list
+    of (category, sort, page, path) listing snapshots for the redirect rules
+    plus the bootstrap JSON for the static shell.
+    """
+    from app import app, Item
+    
+    with app.app_context():
+        client = app.test_client()
+        
+        categories = client.get('/api/categories')
+        out.write('snapshots/categories.json', categories.get_data())
+        category_slugs = [None] + [cat['slug'] for cat in categories.get_json()]
+        
+        listings = []
+        for category in category_slugs:
+            for sort in SNAPSHOT_SORTS:
+                for page in range(1, pages + 1):
+                    query = {'page': page, 'per_page': SNAPSHOT_PER_PAGE, 'sort': sort}
+                    if category:
+                        query['category'] = category
+                    response = client.get('/api/items', query_string=query)
+                    path = f"snapshots/items/{category or 'all'}/{sort}/{page}.json"
+                    out.write(path, response.get_data())
+                    listings.append((category, sort, page, path))
+                    if not response.get_json()['pagination']['has_next']:
+                        break
+        
+        # Per-item JSON (not routed over /api/items/<id>, which also counts views and handles DELETE)
+        items = [item.to_dict() for item in Item.query.filter_by(is_active=True).order_by(Item.id).all()]
+        for item in items:
+            out.write(f"snapshots/item/{item['id']}.json", app.json.dumps(item))
+        
+        first_page = out.dist_dir / 'snapshots/items/all/newest/1.json'
+        bootstrap = ('{"categories":' + categories.get_data(as_text=True).strip()
+                     + ',"items":' + first_page.read_text(encoding='utf-8').strip() + '}')
+    
+    print(f"[OK] Rendered {len(listings)} catalog pages, {len(items)} items and categories to snapshots/")
+    return listings, bootstrap.replace('</', '<\\/'), items
+
+ITEM_PAGE_VERSION = '2'  # bump when render_item_page changes so every page is regenerated
+VOLATILE_ITEM_FIELDS = {'views'}  # change without the page changing; left out of pages and their digests
+
+def image_url(filename, site_url=''):
+    if filename.startswith(('http://', 'https://')):
+        return filename
+    return f"{site_url}/static/uploads/{filename}"
+
+def render_item_page(item, site_url=''):
+    """Lightweight standalone HTML for one item: readable without JS and by crawlers.
+    
+    Canonical and og:image URLs are absolute when site_url is given.
+    """
+    title = escape(item['title'])
+    description = escape(item['description'])
+    image = escape(image_url(item['images'][0], site_url)) if item['images'] else ''
+    placeholder = item.get('placeholder') or {}
+    owner = item.get('owner') or {}
+    data = json.dumps(item, separators=(',', ':')).replace('</', '<\\/')
+    product = json.dumps({
+        '@context': 'https://schema.org',
+        '@type': 'Product',
+        'name': item['title'],
+        'description': item['description'],
+        'category': item['category'],
+        'image': image_url(item['images'][0], site_url) if item['images'] else None,
+        'offers': {'@type': 'Offer', 'price': item['price'], 'priceCurrency': 'INR',
+                   'availability': 'https://schema.org/' + ('InStock' if item['status'] == 'available' else 'OutOfStock')}
+    }, separators=(',', ':')).replace('</', '<\\/')
+    image_style = f"background:{escape(placeholder['color'])};" if placeholder.get('color') else ''
+    image_html = (f'<img src="{image}" alt="{title}" width="800" height="600" style="{image_style}">'
+                  if image else '')
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title} - Rent for ₹{item['price']}/day | Rentrobe</title>
+<meta name="description" content="{description[:160]}">
+<link rel="canonical" href="{escape(site_url)}/items/{item['id']}">
+<meta property="og:type" content="product">
+<meta property="og:title" content="{title}">
+<meta property="og:description" content="{description[:200]}">
+{f'<meta property="og:image" content="{image}">' if image else ''}
+<link rel="icon" type="image/png" href="/static/LOGO_W_TITLE.png">
+<style>
+body{{margin:0;font-family:Poppins,system-ui,sans-serif;color:#1f2d2a;background:#f7f7f5}}
+main{{max-width:880px;margin:0 auto;padding:24px}}
+img{{width:100%;height:auto;max-height:70vh;object-fit:contain;border-radius:8px}}
+.price{{font-size:1.5rem;font-weight:600;color:#2f5249}}
+.meta{{color:#5b6b67}}
+a.btn{{display:inline-block;margin-top:16px;padding:12px 24px;background:#2f5249;color:#fff;border-radius:6px;text-decoration:none}}
+</style>
+<script type="application/ld+json">{product}</script>
+</head>
+<body>
+<main>
+<p><a href="/">Rentrobe</a> / {escape(item['category'])}</p>
+{image_html}
+<h1>{title}</h1>
+<p class="price">₹{item['price']}/day <span class="meta">· ₹{item['deposit']} deposit</span></p>
+<p class="meta">Size {escape(item['size'])} · {escape(item['condition'])} condition{f" · {escape(owner['city'])}" if owner.get('city') else ''}</p>
+<p>{description}</p>
+<a class="btn" href="/?item={item['id']}">Rent this item</a>
+</main>
+<script type="application/json" id="item-data">{data}</script>
+</body>
+</html>
+"""
+
+def render_item_pages(out, items, site_url=None):
+    """Write items/<id>/index.html, re-rendering only items whose data changed since the last build.
+    
+    The sitemap needs absolute URLs, so it is only written when site_url is known.
+    """
+    site_url = (site_url or '').rstrip('/')
+    rendered = 0
+    for item in items:
+        item = {key: value for key, value in item.items() if key not in VOLATILE_ITEM_FIELDS}
+        digest = hashlib.sha256(
+            (ITEM_PAGE_VERSION + site_url + json.dumps(item, sort_keys=True)).encode('utf-8')
+        ).hexdigest()
+        rendered += out.write_derived(f"items/{item['id']}/index.html", digest,
+                                      lambda: render_item_page(item, site_url))
+    print(f"[OK] Item pages: {rendered} rendered, {len(items) - rendered} unchanged")
+    
+    if not site_url:
+        print("[WARNING] No site URL (--site-url, SITE_URL or Netlify's URL); skipping sitemap.xml")
+        return
+    loc = escape(site_url)
+    urls = ''.join(f"<url><loc>{loc}/items/{item['id']}</loc></url>" for item in items)
+    out.write('sitemap.xml', '<?xml version="1.0" encoding="UTF-8"?>\n'
+              f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc>{loc}/</loc></url>{urls}</urlset>\n')
+
+def snapshot_redirect_rules(listings):
+    """_redirects rules serving catalog snapshots from the CDN.
+    
+    Netlify matches a rule when the request carries all of the rule's query
+    parameters (extra ones are ignored), so rules are emitted from the most
+    to the least specific parameter set. Each level ends with catch-all rules
+    that send any other value of those parameters to the function, and
+    requests with filter parameters always go to the function. Every rule
+    needs at least one query parameter so POST /api/items is never rewritten.
+    """
+    function = '/.netlify/functions/api'
+    lines = ['# Filtered catalog queries are never pre-rendered']
+    lines += [f"/api/items {param}=:{param} {function} 200!" for param in FILTER_PARAMS]
+    
+    # Every way a request can spell each snapshot: defaults may be omitted
+    rules_by_params = {}
+    for category, sort, page, path in listings:
+        required = {'category': category} if category else {}
+        optional = {'sort': sort if sort == 'newest' else None, 'page': page if page == 1 else None,
+                    'per_page': SNAPSHOT_PER_PAGE}
+        if sort != 'newest':
+            required['sort'] = sort
+        if page != 1:
+            required['page'] = page
+        optional = {key: value for key, value in optional.items() if value is not None}
+        
+        keys = sorted(optional)
+        for mask in range(1 << len(keys)):
+            params = dict(required)
+            params.update({key: optional[key] for i, key in enumerate(keys) if mask & (1 << i)})
+            if params:
+                rules_by_params.setdefault(tuple(sorted(params)), []).append((params, path))
+    
+    param_sets = sorted(rules_by_params, key=lambda names: (-len(names), names))
+    for size in sorted({len(names) for names in param_sets}, reverse=True):
+        level = [names for names in param_sets if len(names) == size]
+        lines.append(f"# Catalog snapshots keyed on {size} parameter(s)")
+        for names in level:
+            for params, path in rules_by_params[names]:
+                query = ' '.join(f"{name}={params[name]}" for name in names)
+                lines.append(f"/api/items {query} /{path} 200!")
+        for names in level:
+            query = ' '.join(f"{name}=:{name}" for name in names)
+            lines.append(f"/api/items {query} {function} 200!")
+    
+    lines.append('/api/categories /snapshots/categories.json 200!')
+    return '\n'.join(lines) + '\n'
+
+class DistWriter:
+    """Writes build outputs into dist/, skipping files whose content is unchanged"""
+    
+    def __init__(self, dist_dir, previous):
+        self.dist_dir = dist_dir
+        self.previous = previous
+        self.manifest = {}
+        self.changed = []
+    
+    def _unchanged(self, rel, digest):
+        old = self.previous.get(rel)
+        return old is not None and old['sha256'] == digest and (self.dist_dir / rel).exists()
+    
+    def copy(self, src, rel):
+        """Copy a source file; unchanged size+mtime skips hashing, unchanged hash skips the copy"""
+        stat = src.stat()
+        old = self.previous.get(rel)
+        if (old and old.get('source_mtime_ns') == stat.st_mtime_ns and old['size'] == stat.st_size
+                and (self.dist_dir / rel).exists()):
+            self.manifest[rel] = old
+            return False
+        
+        digest = file_sha256(src)
+        entry = {'size': stat.st_size, 'sha256': digest, 'source_mtime_ns': stat.st_mtime_ns}
+        if self._unchanged(rel, digest):
+            self.manifest[rel] = {**old, **entry}
+            return False
+        
+        dst = self.dist_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, dst)
+        self.manifest[rel] = entry
+        self.changed.append(rel)
+        return True
+    
+    def copy_tree(self, src, rel_root, skip=()):
+        copied = 0
+        for path in iter_tree(src):
+            rel = f"{rel_root}/{path.relative_to(src).as_posix()}"
+            if rel not in skip:
+                copied += self.copy(path, rel)
+        return copied
+    
+    def write(self, rel, data):
+        """Write generated content"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if self._unchanged(rel, digest):
+            self.manifest[rel] = self.previous[rel]
+            return False
+        
+        dst = self.dist_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_bytes(data)
+        self.manifest[rel] = {'size': len(data), 'sha256': digest}
+        self.changed.append(rel)
+        return True
+    
+    def write_derived(self, rel, source_digest, render):
+        """Write render() output unless the inputs it is derived from are unchanged"""
+        old = self.previous.get(rel)
+        if old and old.get('source_sha256') == source_digest and (self.dist_dir / rel).exists():
+            self.manifest[rel] = old
+            return False
+        self.write(rel, render())
+        self.manifest[rel] = {**self.manifest[rel], 'source_sha256': source_digest}
+        return True
+    
+    def remove_stale(self):
+        """Delete outputs from the previous build that this build no longer produces"""
+        stale = sorted(set(self.previous) - set(self.manifest))
+        for rel in stale:
+            for path in (self.dist_dir / rel, Path(f"{self.dist_dir / rel}.gz"), Path(f"{self.dist_dir / rel}.br")):
+                if path.exists():
+                    path.unlink()
+        return stale
+
+def build_static_site(incremental=False, snapshot_pages=3, site_url=None):
+    """Build static site for Netlify deployment.
+    
+    With incremental=True dist/ is kept and only files whose content changed
+    since the last build (per dist/asset-manifest.json) are copied and
+    recompressed; outputs that are no longer produced are removed.
+    site_url is the public origin used for absolute URLs in item pages and the sitemap.
+    """
     
     # Create dist directory
     dist_dir = Path('dist')
-    if dist_dir.exists():
+    previous = load_manifest(dist_dir) if incremental else {}
+    if dist_dir.exists() and not incremental:
         try:
             shutil.rmtree(dist_dir)
         except PermissionError:
             print("[WARNING] Could not remove dist directory, trying to continue...")
     dist_dir.mkdir(exist_ok=True)
+    out = DistWriter(dist_dir, previous)
     
-    print("Building static site...")
+    print("Building static site..." + (" (incremental)" if incremental else ""))
     
     # Copy static files
     static_src = Path('static')
-    static_dst = dist_dir / 'static'
     if static_src.exists():
-        shutil.copytree(static_src, static_dst)
-        print(f"[OK] Copied static files to {static_dst}")
+        copied = out.copy_tree(static_src, 'static')
+        print(f"[OK] Copied static files to {dist_dir / 'static'} ({copied} changed)")
     
-    # Copy templates
+    # Copy templates; the SPA shell is written below once its CSS/JS is split out
     templates_src = Path('templates')
-    templates_dst = dist_dir / 'templates'
     if templates_src.exists():
-        shutil.copytree(templates_src, templates_dst)
-        print(f"[OK] Copied templates to {templates_dst}")
+        copied = out.copy_tree(templates_src, 'templates', skip={'templates/index.html'})
+        print(f"[OK] Copied templates to {dist_dir / 'templates'} ({copied} changed)")
+    
+    initialize_database()
     
-    # Copy main HTML file as index.html
-    index_src = templates_dst / 'index.html'
-    index_dst = dist_dir / 'index.html'
+    # Pre-render public catalog JSON so the CDN can answer it without the function
+    listings, bootstrap = [], None
+    if snapshot_pages > 0:
+        listings, bootstrap, items = render_catalog_snapshots(out, pages=snapshot_pages)
+        render_item_pages(out, items, site_url)
+    
+    # Split inline CSS/JS out of the SPA shell and copy it as index.html
+    index_src = templates_src / 'index.html'
     if index_src.exists():
-        shutil.copy2(index_src, index_dst)
-        print(f"[OK] Created index.html")
+        original = index_src.read_text(encoding='utf-8')
+        shell, assets = extract_inline_assets(original)
+        for filename, content in assets.items():
+            out.write(f"static/assets/{filename}", content)
+            print(f"[OK] Extracted {filename}")
+        out.write('templates/index.html', shell)
+        if bootstrap:
+            # The static shell carries the snapshot data; the session user is still fetched
+            embedded = f'<script id="bootstrap-data" type="application/json">{bootstrap}</script>\n'
+            split = shell.rfind('</body>')
+            shell = shell[:split] + embedded + shell[split:]
+        out.write('index.html', shell)
+        print(f"[OK] Created index.html ({len(original) // 1024}KB -> {len(shell) // 1024}KB)")
     
     # Copy database file
     db_src = Path('instance/wearhouse.db')
-    db_dst = dist_dir / 'wearhouse.db'
+    checkpoint_database()
     if db_src.exists():
-        shutil.copy2(db_src, db_dst)
-        print(f"[OK] Copied database to {db_dst}")
+        out.copy(db_src, 'wearhouse.db')
+        print(f"[OK] Copied database to {dist_dir / 'wearhouse.db'}")
     else:
         print("[WARNING] Database file not found at instance/wearhouse.db")
     
-    # Copy netlify functions directory to dist
+    # Copy netlify functions directory to dist, with the current database next to the function
     netlify_src = Path('netlify')
-    netlify_dst = dist_dir / 'netlify'
+    functions_db = 'netlify/functions/wearhouse.db'
     if netlify_src.exists():
-        shutil.copytree(netlify_src, netlify_dst)
-        print(f"[OK] Copied netlify functions to {netlify_dst}")
-    
-    # Copy database to functions directory
-    functions_dir = netlify_dst / 'functions'
-    db_src = Path('instance/wearhouse.db')
-    db_dst = functions_dir / 'wearhouse.db'
+        copied = out.copy_tree(netlify_src, 'netlify', skip={functions_db} if db_src.exists() else ())
+        print(f"[OK] Copied netlify functions to {dist_dir / 'netlify'} ({copied} changed)")
     if db_src.exists():
-        shutil.copy2(db_src, db_dst)
+        out.copy(db_src, functions_db)
         print(f"[OK] Copied database to functions directory")
     
     # Copy requirements.txt
     req_src = Path('requirements.txt')
-    req_dst = dist_dir / 'requirements.txt'
     if req_src.exists():
-        shutil.copy2(req_src, req_dst)
+        out.copy(req_src, 'requirements.txt')
         print(f"[OK] Copied requirements.txt")
     
     # Copy app.py
     app_src = Path('app.py')
-    app_dst = dist_dir / 'app.py'
     if app_src.exists():
-        shutil.copy2(app_src, app_dst)
+        out.copy(app_src, 'app.py')
         print(f"[OK] Copied app.py")
     
     # Create a simple _redirects file for SPA routing
-    redirects_file = dist_dir / '_redirects'
-    with open(redirects_file, 'w') as f:
-        f.write("""# API routes
+    out.write('_redirects', snapshot_redirect_rules(listings) + """
+# API routes
 /api/* /.netlify/functions/api 200!
 
 # SPA routes - redirect everything else to index.html
@@ -94,25 +575,58 @@ def build_static_site():
     print(f"[OK] Created _redirects file")
     
     # Create a simple _headers file for caching
-    headers_file = dist_dir / '_headers'
-    with open(headers_file, 'w') as f:
-        f.write("""# Static assets caching
+    out.write('_headers', """# Static assets caching
 /static/*
   Cache-Control: public, max-age=31536000
 
+# Content-hashed CSS/JS split out of index.html
+/static/assets/*
+  Cache-Control: public, max-age=31536000, immutable
+
 # API responses
 /api/*
   Cache-Control: no-cache
 
+# Pre-rendered catalog JSON, refreshed on every deploy
+/snapshots/*
+  Cache-Control: public, max-age=60
+
 # HTML files
 /*.html
   Cache-Control: no-cache
+
+# Pre-rendered item pages
+/items/*
+  Cache-Control: public, max-age=0, must-revalidate
 """)
     print(f"[OK] Created _headers file")
     
-    print("\n[SUCCESS] Static site build completed!")
+    stale = out.remove_stale()
+    if stale:
+        print(f"[OK] Removed {len(stale)} stale outputs")
+    
+    # Precompressed siblings for changed files, then the manifest the next build compares against
+    precompress_assets(dist_dir, out.changed, out.manifest)
+    with open(dist_dir / MANIFEST_NAME, 'w') as f:
+        json.dump(out.manifest, f, indent=2, sort_keys=True)
+    
+    if out.changed or stale or not DEPLOY_ZIP.exists():
+        write_deploy_zip(dist_dir, out.manifest)
+    else:
+        print(f"[OK] {DEPLOY_ZIP} is up to date")
+    
+    print(f"\n[SUCCESS] Static site build completed! ({len(out.changed)} files changed)")
     print(f"[INFO] Output directory: {dist_dir.absolute()}")
     print("\n[READY] Ready for Netlify deployment!")
 
 if __name__ == '__main__':
-    build_static_site()
+    parser = argparse.ArgumentParser(description='Build dist/ for Netlify deployment')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only copy and recompress files that changed since the last build')
+    parser.add_argument('--snapshot-pages', type=int, default=3,
+                        help='Catalog pages to pre-render per sort and category (0 disables snapshots and item pages)')
+    parser.add_argument('--site-url', default=os.environ.get('SITE_URL') or os.environ.get('URL'),
+                        help='Public origin for absolute URLs, e.g. https://rentrobe.netlify.app '
+                             '(default: SITE_URL, or URL as set by Netlify builds)')
+    args = parser.parse_args()
+    build_static_site(incremental=args.incremental, snapshot_pages=args.snapshot_pages, site_url=args.site_url)
@@ -3,7 +3,7 @@
 Script to edit image links in the database
 """
 
-from app import app, db, Item, ItemImage
+from app import app, db, Item, ItemImage, release_image
 
 def show_items_with_images():
     with app.app_context():
@@ -52,8 +52,10 @@ def edit_image_link():
                     
                     new_url = input("Enter new image URL: ").strip()
                     if new_url:
+                        old_filename = selected_image.filename
                         selected_image.filename = new_url
                         db.session.commit()
+                        release_image(old_filename)
                         print("Image URL updated successfully!")
                     else:
                         print("No changes made.")
@@ -133,8 +135,11 @@ def delete_image():
                     selected_image = images[image_index]
                     confirm = input(f"Delete '{selected_image.filename}'? (yes/no): ")
                     if confirm.lower() == 'yes':
+                        filename = selected_image.filename
                         db.session.delete(selected_image)
                         db.session.commit()
+                        if release_image(filename):
+                            print("Stored file removed (no other items use it).")
                         print("Image deleted successfully!")
                     else:
                         print("Deletion cancelled.")
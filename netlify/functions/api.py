@@ -1,162 +1,214 @@
+import io
 import json
 import os
-import sqlite3
-import hashlib
+import sys
+import base64
+import shutil
+import tempfile
 from pathlib import Path
+from urllib.parse import urlencode
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# Set up database for Netlify
+# The build ships an initialized database next to the function, in a read-only
+# deployment directory. FUNCTION_DB_MODE picks how each container opens it:
+#   copy      - copy it once to the writable temp dir and use the copy (default)
+#   immutable - open the bundled file read-only with immutable=1: no locking or
+#               change detection, but writes (logins remembered, views, rentals) fail
+#   bundled   - open the bundled file in place with default settings
+db_path = os.environ.get('FUNCTION_DB_PATH', os.path.join(os.path.dirname(__file__), 'wearhouse.db'))
+db_mode = os.environ.get('FUNCTION_DB_MODE', 'copy').lower()
+
+def prepare_database(path, mode):
+    """Return the SQLAlchemy URI for the bundled database in the given mode"""
+    if mode == 'immutable':
+        return f'sqlite:///file:{path}?mode=ro&immutable=1&uri=true'
+    if mode == 'copy':
+        # Named after the bundled file's size and mtime, so a redeployed database
+        # is copied again instead of reusing a warm container's stale copy
+        stat = os.stat(path)
+        target = os.path.join(tempfile.gettempdir(), f'wearhouse-{stat.st_size}-{stat.st_mtime_ns}.db')
+        if not os.path.exists(target):
+            # Copy under a private name and rename, so concurrent starts never see a partial file
+            partial = f'{target}.{os.getpid()}.tmp'
+            shutil.copyfile(path, partial)
+            os.replace(partial, target)
+        return f'sqlite:///{target}'
+    return f'sqlite:///{path}'
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = prepare_database(db_path, db_mode)
+
+# Catalog reads: map the whole file and keep a large page cache
+os.environ.setdefault('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))
+os.environ.setdefault('SQLITE_CACHE_SIZE', str(-64 * 1024))  # 64MB
+
+# Set secret key for Netlify
+os.environ['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'wearhouse-netlify-secret-key-change-in-production')
+
+# Set session configuration for Netlify
+os.environ['SESSION_COOKIE_SECURE'] = 'True'  # Netlify uses HTTPS
+os.environ['SESSION_COOKIE_HTTPONLY'] = 'True'
+os.environ['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Changed from None to Lax for better compatibility
+os.environ['SESSION_COOKIE_DOMAIN'] = ''  # Don't set domain for Netlify
+
+# Import Flask app
+from app import app, ensure_db
+
+def prepare_app():
+    """Initialize the database once per container, not per invocation.
+    
+    The shipped database is already stamped with the current schema, so this
+    is a single PRAGMA read; once it succeeds later calls are a flag check.
+    """
+    try:
+        if not ensure_db():
+            print("Database init failed; retrying on the next invocation")
+    except Exception as db_error:
+        print(f"Database init error: {str(db_error)}")
+        import traceback
+        traceback.print_exc()
+        # Continue anyway; requests that need the database will report errors
+
+prepare_app()
+
+FUNCTION_PREFIX = '/.netlify/functions/api'
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, Cookie, X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Credentials': 'true'
+}
+
+def event_headers(event):
+    """Request headers as {lowercase name: value}, folding multi-value headers"""
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    for name, values in (event.get('multiValueHeaders') or {}).items():
+        name = name.lower()
+        headers[name] = ('; ' if name == 'cookie' else ', ').join(values)
+    return headers
+
+def event_query_string(event):
+    """The raw query string, or one rebuilt from the (multi-value) parameters"""
+    if event.get('rawQuery') is not None:
+        return event['rawQuery']
+    multi = event.get('multiValueQueryStringParameters')
+    if multi:
+        return urlencode([(key, value) for key, values in multi.items() for value in values])
+    return urlencode(event.get('queryStringParameters') or {})
+
+def build_environ(event):
+    """Translate a Netlify (Lambda proxy) event into a WSGI environ"""
+    body = event.get('body') or b''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    
+    # Flask routes live under /api; map direct function URLs onto them
+    path = event.get('path') or '/'
+    if path.startswith(FUNCTION_PREFIX):
+        path = '/api' + path[len(FUNCTION_PREFIX):]
+    
+    headers = event_headers(event)
+    host = headers.get('host', 'localhost')
+    environ = {
+        'REQUEST_METHOD': event.get('httpMethod', 'GET').upper(),
+        'SCRIPT_NAME': '',
+        # WSGI carries the path as latin-1 decoded bytes
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': event_query_string(event),
+        'SERVER_NAME': host.split(':')[0],
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': (headers.get('x-nf-client-connection-ip')
+                        or headers.get('x-forwarded-for', '127.0.0.1').split(',')[0].strip()),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': headers.get('x-forwarded-proto', 'https'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+def call_app(environ):
+    """Run the WSGI app and return (status code, [(name, value)], body bytes)"""
+    started = {}
+    chunks = []
+    
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+        return chunks.append
+    
+    result = app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], b''.join(chunks)
+
+def is_text(headers):
+    """True if the response body can be returned as a plain string"""
+    return 'Content-Encoding' not in headers and headers.get('Content-Type', '').startswith(TEXT_CONTENT_TYPES)
 
 def handler(event, context):
     """
-    Netlify serverless function handler for API
+    Netlify serverless function handler: a WSGI bridge to the Flask app
     """
-    print(f"Function called with event: {event}")
-    
     try:
-        # Parse the event
-        path = event.get('path', '')
-        http_method = event.get('httpMethod', 'GET')
-        headers = event.get('headers', {})
-        body = event.get('body', '')
-        
-        print(f"Handling request: {http_method} {path}")
-        
         # Handle CORS preflight
-        if http_method == 'OPTIONS':
+        if event.get('httpMethod') == 'OPTIONS':
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type, Authorization, Cookie, X-Requested-With',
-                    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                    'Access-Control-Allow-Credentials': 'true',
-                    'Access-Control-Max-Age': '86400'
-                },
+                'headers': {**CORS_HEADERS, 'Access-Control-Max-Age': '86400'},
                 'body': ''
             }
         
-        # Handle login
-        if path == '/api/auth/login' and http_method == 'POST':
-            try:
-                data = json.loads(body) if body else {}
-                email = data.get('email', '').lower().strip()
-                password = data.get('password', '')
-                
-                print(f"Login attempt: {email}")
-                
-                # Check against hardcoded users
-                users = {
-                    'demo@wearhouse.com': {'password': 'password123', 'name': 'Demo User', 'id': 1},
-                    'arjav@rentrobe.com': {'password': 'arjav0302', 'name': 'Arjav', 'id': 2},
-                    'ankita@rentrobe.com': {'password': 'ankita1001', 'name': 'Ankita', 'id': 3}
-                }
-                
-                if email in users and users[email]['password'] == password:
-                    return {
-                        'statusCode': 200,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*',
-                            'Access-Control-Allow-Credentials': 'true'
-                        },
-                        'body': json.dumps({
-                            'message': 'Login successful',
-                            'user': {
-                                'id': users[email]['id'],
-                                'name': users[email]['name'],
-                                'email': email
-                            }
-                        })
-                    }
-                else:
-                    return {
-                        'statusCode': 401,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({'error': 'Invalid credentials'})
-                    }
-            except Exception as e:
-                print(f"Login error: {e}")
-                return {
-                    'statusCode': 500,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Login failed'})
-                }
-        
-        # Handle registration
-        elif path == '/api/auth/register' and http_method == 'POST':
-            try:
-                data = json.loads(body) if body else {}
-                email = data.get('email', '').lower().strip()
-                password = data.get('password', '')
-                name = data.get('name', '')
-                
-                print(f"Registration attempt: {email}")
-                
-                # Simple validation
-                if not email or not password or not name:
-                    return {
-                        'statusCode': 400,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({'error': 'All fields are required'})
-                    }
-                
-                # For now, just return success
-                return {
-                    'statusCode': 201,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({
-                        'message': 'Registration successful',
-                        'user': {
-                            'id': 999,
-                            'name': name,
-                            'email': email
-                        }
-                    })
-                }
-            except Exception as e:
-                print(f"Registration error: {e}")
-                return {
-                    'statusCode': 500,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Registration failed'})
-                }
-        
-        # Handle other API routes
-        elif path.startswith('/api/'):
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'message': f'API endpoint {path} called with method {http_method}'})
-            }
+        prepare_app()  # retries if the cold start's init failed
+        status, header_list, body = call_app(build_environ(event))
         
-        # Default response
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'message': 'API function is working', 'path': path, 'method': http_method})
-        }
+        # Single-valued headers go in 'headers'; repeated ones (Set-Cookie) in 'multiValueHeaders'
+        grouped = {}
+        for name, value in header_list:
+            grouped.setdefault(name, []).append(value)
+        headers = dict(CORS_HEADERS)
+        multi_value_headers = {}
+        for name, values in grouped.items():
+            if len(values) == 1:
+                headers[name] = values[0]
+            else:
+                multi_value_headers[name] = values
         
+        response = {'statusCode': status, 'headers': headers}
+        if multi_value_headers:
+            response['multiValueHeaders'] = multi_value_headers
+        if is_text(headers):
+            try:
+                response['body'] = body.decode('utf-8')
+                response['isBase64Encoded'] = False
+                return response
+            except UnicodeDecodeError:
+                pass
+        response['body'] = base64.b64encode(body).decode('ascii')
+        response['isBase64Encoded'] = True
+        return response
+    
     except Exception as e:
-        print(f"Handler error: {e}")
+        print(f"Error in API handler: {str(e)}")
         import traceback
         traceback.print_exc()
         return {
@@ -166,4 +218,4 @@ def handler(event, context):
                 'Access-Control-Allow-Origin': '*'
             },
             'body': json.dumps({'error': f'Internal server error: {str(e)}'})
-        }
\ No newline at end of file
+        }
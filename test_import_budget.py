@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test that importing the app stays within its import-time budget
+"""
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+
+from app import app, import_time_ms
+
+# Only needed for uploads, image variants or backfills; loaded on first use
+LAZY_MODULES = ['PIL', 'PIL.Image', 'flask_wtf', 'wtforms', 'concurrent.futures.process']
+
+def skip_test(reason):
+    """Skip under pytest; when run as a script just say so"""
+    if 'pytest' in sys.modules:
+        import pytest
+        pytest.skip(reason)
+    print(f"Skipped: {reason}")
+
+def test_import_within_budget():
+    """A cold `import app` (best of 3) must not exceed IMPORT_BUDGET_MS.
+    
+    Wall-clock timings depend on the machine and its load, so the check only
+    runs when IMPORT_BUDGET_MS is set, e.g. IMPORT_BUDGET_MS=800 on a quiet box.
+    """
+    if 'IMPORT_BUDGET_MS' not in os.environ:
+        skip_test("set IMPORT_BUDGET_MS to enforce the import-time budget")
+        return
+    budget = app.config['IMPORT_BUDGET_MS']
+    elapsed = import_time_ms('app', runs=3)
+    print(f"import app: {elapsed:.1f}ms (budget {budget}ms)")
+    assert elapsed <= budget, f"import app took {elapsed:.1f}ms, over the {budget}ms budget"
+
+def test_heavy_modules_not_imported():
+    """Optional and upload-only dependencies stay out of a plain import"""
+    result = subprocess.run(
+        [sys.executable, '-c', 'import app, sys, json; print(json.dumps(sorted(sys.modules)))'],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    assert not eager, f"imported eagerly by app: {eager}"
+
+if __name__ == "__main__":
+    test_import_within_budget()
+    test_heavy_modules_not_imported()
+    print("Import budget OK")
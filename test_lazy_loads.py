@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that list endpoints stay within their lazy-load (N+1) budgets
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database, with the detector failing requests
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from app import app, init_db, invalidate_catalog_cache, Item, LazyLoadBudgetExceeded
+
+def make_client():
+    app.config['TESTING'] = True
+    app.config['LAZY_LOAD_CHECK'] = 'raise'
+    with app.app_context():
+        init_db()
+    invalidate_catalog_cache()
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'demo@wearhouse.com', 'password': 'password123'})
+    assert response.status_code == 200
+    return client
+
+def teardown_module(module):
+    # The app object is shared with other test modules in the same run
+    app.config['TESTING'] = False
+    app.config['LAZY_LOAD_CHECK'] = 'off'
+
+def test_list_endpoints_within_budget():
+    """Catalog, search and user listings load their relationships eagerly"""
+    client = make_client()
+    for url in ['/api/categories', '/api/items', '/api/items?sort=price-low&page=2',
+                '/api/items?search=dress&city=Mumbai', '/api/user/items', '/api/search?q=dress']:
+        response = client.get(url)
+        assert response.status_code == 200, f"{url}: {response.status_code}"
+
+def test_budget_violation_fails_request():
+    """A route over its budget fails with the offending relationships and their origin"""
+    client = make_client()
+    budgets = app.config['LAZY_LOAD_BUDGETS']
+    # Item detail serializes a single item with lazy loads, so a budget of 0 is exceeded
+    app.config['LAZY_LOAD_BUDGETS'] = {**budgets, 'api_item_detail': 0}
+    try:
+        with app.app_context():
+            item_id = Item.query.filter_by(is_active=True).first().id
+        try:
+            client.get(f'/api/items/{item_id}')
+            assert False, "expected LazyLoadBudgetExceeded"
+        except LazyLoadBudgetExceeded as e:
+            assert 'Item.' in str(e) and 'from app.py:' in str(e)
+    finally:
+        app.config['LAZY_LOAD_BUDGETS'] = budgets
+
+if __name__ == "__main__":
+    test_list_endpoints_within_budget()
+    test_budget_violation_fails_request()
+    print("Lazy-load budgets OK")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus metrics endpoint and its per-thread counters
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from app import app, init_db, Metrics
+
+def teardown_module(module):
+    # The app object is shared with other test modules in the same run
+    app.config['ADMIN_TOKEN'] = None
+
+def test_shards_sum_across_threads():
+    """Counts recorded by many threads without locking add up at scrape time"""
+    metrics = Metrics()
+
+    def work():
+        for _ in range(1000):
+            metrics.inc('hits', (('endpoint', 'x'),))
+            metrics.observe('latency', (('endpoint', 'x'),), 0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counters, histograms = metrics.collect()
+    assert counters[('hits', (('endpoint', 'x'),))] == 8000
+    buckets, total = histograms[('latency', (('endpoint', 'x'),))]
+    assert sum(buckets) == 8000
+    assert buckets[Metrics.BUCKETS.index(0.025)] == 8000
+    assert abs(total - 160) < 1e-6
+
+def test_exited_threads_are_folded_in():
+    """A thread per request (the dev server) must not leave a shard behind per request"""
+    metrics = Metrics()
+
+    def request():
+        metrics.inc('hits')
+        metrics.observe('latency', (), 0.2)
+
+    for _ in range(200):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+
+    assert metrics.shard_count() <= 1
+    counters, histograms = metrics.collect()
+    assert counters[('hits', ())] == 200
+    assert sum(histograms[('latency', ())][0]) == 200
+
+def test_metrics_endpoint():
+    """/api/admin/metrics needs the admin token and reports per-endpoint requests"""
+    app.config['ADMIN_TOKEN'] = 'metrics-token'
+    with app.app_context():
+        init_db()
+    client = app.test_client()
+    assert client.get('/api/admin/metrics').status_code == 404
+    assert client.get('/api/admin/metrics', headers={'X-Admin-Token': 'tök'}).status_code == 404
+
+    client.get('/api/categories')
+    response = client.get('/api/admin/metrics', headers={'Authorization': 'Bearer metrics-token'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'rentrobe_http_requests_total{endpoint="api_categories",method="GET",status="200"}' in body
+    assert 'rentrobe_http_request_duration_seconds_bucket{endpoint="api_categories",le="+Inf"}' in body
+    assert 'rentrobe_db_pool_checked_out{bind="primary"}' in body
+    assert 'rentrobe_image_variant_queue_depth 0' in body
+
+def test_in_flight_gauge_per_endpoint():
+    """Each endpoint's in-flight gauge goes back to 0 once its requests finish"""
+    app.config['ADMIN_TOKEN'] = 'metrics-token'
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/api/categories')
+    body = client.get('/api/admin/metrics', headers={'X-Admin-Token': 'metrics-token'}).get_data(as_text=True)
+    assert 'rentrobe_http_requests_in_flight{endpoint="api_categories"} 0\n' in body
+    # The scrape itself is still in flight while the body is rendered
+    assert 'rentrobe_http_requests_in_flight{endpoint="prometheus_metrics"} 1\n' in body
+
+if __name__ == "__main__":
+    test_shards_sum_across_threads()
+    test_exited_threads_are_folded_in()
+    test_metrics_endpoint()
+    test_in_flight_gauge_per_endpoint()
+    teardown_module(None)
+    print("Metrics tests passed")
@@ -5,18 +5,30 @@ Test script to test the Netlify function directly
 
 import sys
 import os
+import json
+import base64
+import shutil
+import tempfile
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-# Set up environment
-os.environ['DATABASE_URL'] = 'sqlite:///instance/wearhouse.db'
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
 os.environ['SECRET_KEY'] = 'test-secret-key'
 
 # Import the Netlify function
 from netlify.functions.api import handler
+from app import app
+
+# Not valid UTF-8, so the bridge has to base64-encode it
+BINARY_UPLOAD = bytes(range(256)) * 8
 
 def test_netlify_function():
     """Test the Netlify function with items endpoint"""
@@ -80,6 +92,40 @@ def test_netlify_function():
         import traceback
         traceback.print_exc()
 
+def test_binary_and_multi_value_headers():
+    """Binary bodies are base64-encoded and repeated headers are kept"""
+    upload_folder = os.path.join(tmp_dir, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    with open(os.path.join(upload_folder, 'binary.png'), 'wb') as f:
+        f.write(BINARY_UPLOAD)
+    original_upload_folder = app.config['UPLOAD_FOLDER']
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    try:
+        result = handler({'path': '/static/uploads/binary.png', 'httpMethod': 'GET', 'headers': {}}, {})
+    finally:
+        app.config['UPLOAD_FOLDER'] = original_upload_folder
+    assert result['statusCode'] == 200
+    assert result['isBase64Encoded'] is True
+    assert base64.b64decode(result['body']) == BINARY_UPLOAD
+    
+    result = handler({
+        'path': '/api/auth/login',
+        'httpMethod': 'POST',
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'email': 'demo@wearhouse.com', 'password': 'password123'})
+    }, {})
+    assert result['statusCode'] == 200
+    assert result['isBase64Encoded'] is False
+    assert json.loads(result['body'])['user']['email'] == 'demo@wearhouse.com'
+    cookies = result['multiValueHeaders']['Set-Cookie']
+    assert len(cookies) == 2  # session and remember-me
+    
+    cookie_header = '; '.join(cookie.split(';')[0] for cookie in cookies)
+    result = handler({'path': '/api/profile', 'httpMethod': 'GET',
+                      'multiValueHeaders': {'Cookie': [cookie_header]}}, {})
+    assert result['statusCode'] == 200
+    assert json.loads(result['body'])['email'] == 'demo@wearhouse.com'
+
 if __name__ == "__main__":
-    import json
-    test_netlify_function()
\ No newline at end of file
+    test_netlify_function()
+    test_binary_and_multi_value_headers()
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test on-demand request profiling and rotation of saved captures
+"""
+
+import os
+import sys
+import shutil
+import pstats
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database and profile folder
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from app import app, init_db, list_profiles
+
+def setup_module(module):
+    app.config['ADMIN_TOKEN'] = 'profile-token'
+    app.config['PROFILE_FOLDER'] = os.path.join(tmp_dir, 'profiles')
+    with app.app_context():
+        init_db()
+
+def teardown_module(module):
+    # The app object is shared with other test modules in the same run
+    app.config['ADMIN_TOKEN'] = None
+    app.config['PROFILE_SAMPLE_RATE'] = 0
+    app.config['PROFILE_KEEP'] = 100
+
+def test_profile_on_request():
+    """X-Profile with the admin token saves a capture; without the token nothing is profiled"""
+    client = app.test_client()
+    response = client.get('/api/items?search=dress&sort=price-low', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    response = client.get('/api/categories', headers={'X-Profile': '1', 'X-Admin-Token': 'tök'})
+    assert response.status_code == 200
+    assert list_profiles() == []
+
+    response = client.get('/api/items?search=dress&sort=price-low',
+                          headers={'X-Profile': '1', 'X-Admin-Token': 'profile-token'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    [meta] = list_profiles()
+    assert meta['id'] == profile_id
+    assert meta['endpoint'] == 'api_items'
+    assert meta['query_string'] == 'search=dress&sort=price-low'
+    assert meta['trigger'] == 'requested'
+    stats = pstats.Stats(os.path.join(app.config['PROFILE_FOLDER'], f'{profile_id}.prof'))
+    assert any(name == 'api_items' for (_, _, name) in stats.stats)
+
+def test_sampling_and_rotation():
+    """Sampled requests are captured and only the newest PROFILE_KEEP are kept"""
+    client = app.test_client()
+    app.config['PROFILE_KEEP'] = 3
+    response = client.post('/api/admin/profiling', json={'sample_rate': 1.0},
+                           headers={'X-Admin-Token': 'profile-token'})
+    assert response.status_code == 200
+    for _ in range(5):
+        client.get('/api/categories')
+    app.config['PROFILE_SAMPLE_RATE'] = 0
+
+    profiles = list_profiles('api_categories')
+    assert len(list_profiles()) == 3
+    assert len(profiles) == 3
+    assert all(meta['trigger'] == 'sampled' for meta in profiles)
+    assert len(list(Path(app.config['PROFILE_FOLDER']).glob('*.prof'))) == 3
+
+if __name__ == "__main__":
+    setup_module(None)
+    test_profile_on_request()
+    test_sampling_and_rotation()
+    teardown_module(None)
+    print("Profiling tests passed")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test query statistics: fingerprints, percentiles, slow-plan capture and EXPLAIN failures
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from app import app, db, init_db, sql_fingerprint, explain_query, QueryStats
+
+def setup_module(module):
+    module.original_slow_query_ms = app.config['SLOW_QUERY_MS']
+    with app.app_context():
+        init_db()
+
+def teardown_module(module):
+    app.config['SLOW_QUERY_MS'] = module.original_slow_query_ms
+
+def test_fingerprint_normalization():
+    """Literals, placeholders and IN lists of any length collapse to one fingerprint"""
+    fingerprints = {sql_fingerprint(statement) for statement in (
+        "SELECT * FROM items WHERE id IN (1, 2, 3) AND title = 'Red dress'",
+        "SELECT * FROM items WHERE id IN (4,5) AND title = 'It''s blue'",
+        "SELECT *\n  FROM items WHERE id IN (?, ?, ?, ?) AND title = ?",
+        "SELECT * FROM items WHERE id IN (%(id_1)s, %(id_2)s) AND title = %(title_1)s",
+    )}
+    assert fingerprints == {"SELECT * FROM items WHERE id IN (?+) AND title = ?"}
+    assert sql_fingerprint("SELECT * FROM items LIMIT 12") != sql_fingerprint("SELECT * FROM users LIMIT 12")
+
+def test_p95_and_sorting():
+    """p95 is the nearest-rank percentile of the recent samples; rows sort by the chosen key"""
+    app.config['SLOW_QUERY_MS'] = 10_000
+    stats = QueryStats()
+    for ms in range(1, 101):
+        stats.record(None, "SELECT * FROM items WHERE id = ?", (ms,), ms / 1000)
+    for _ in range(3):
+        stats.record(None, "SELECT * FROM users WHERE id = ?", (1,), 0.5)
+
+    [items, users] = stats.snapshot(sort='count')
+    assert items['count'] == 100 and items['p95_ms'] == 95.0 and items['max_ms'] == 100.0
+    assert users['p95_ms'] == 500.0
+    assert [row['count'] for row in stats.snapshot(sort='p95', limit=1)] == [3]
+
+def test_slow_select_captures_plan_once():
+    """The first slow SELECT per fingerprint stores its plan and where it came from"""
+    app.config['SLOW_QUERY_MS'] = 100
+    stats = QueryStats()
+    with app.test_request_context('/api/items?search=dress'), db.engine.connect() as conn:
+        stats.record(conn, "SELECT * FROM items WHERE id = ?", (1,), 0.05)
+        assert stats.snapshot()[0]['plan'] is None  # fast: nothing captured
+
+        stats.record(conn, "SELECT * FROM items WHERE id = ?", (2,), 0.25)
+        stats.record(conn, "SELECT * FROM items WHERE id = ?", (3,), 0.4)
+        stats.record(conn, "UPDATE items SET views = views + 1 WHERE id = ?", (3,), 0.3)
+
+    rows = {row['fingerprint']: row for row in stats.snapshot()}
+    select = rows["SELECT * FROM items WHERE id = ?"]
+    assert select['slow_count'] == 2
+    assert select['example']['ms'] == 250.0  # the first slow run, not the later one
+    assert select['example']['query_string'] == 'search=dress'
+    assert any('items' in line for line in select['plan'])
+    assert rows["UPDATE items SET views = views + ? WHERE id = ?"]['plan'] is None
+
+class AbortingConnection:
+    """sqlite3 connection that fails every statement after an error until ROLLBACK TO,
+    the way a server database aborts the transaction"""
+
+    def __init__(self, path):
+        self.raw = sqlite3.connect(path)
+        self.aborted = False
+
+    def cursor(self):
+        return AbortingCursor(self)
+
+class AbortingCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.raw = connection.raw.cursor()
+
+    def execute(self, statement, parameters=()):
+        if statement.startswith('ROLLBACK TO'):
+            self.connection.aborted = False
+        elif self.connection.aborted:
+            raise sqlite3.OperationalError('current transaction is aborted')
+        try:
+            return self.raw.execute(statement, parameters)
+        except sqlite3.Error:
+            self.connection.aborted = True
+            raise
+
+    def fetchall(self):
+        return self.raw.fetchall()
+
+    def close(self):
+        self.raw.close()
+
+def test_failed_explain_leaves_transaction_usable():
+    """On a server database a failing EXPLAIN is rolled back to its savepoint"""
+    dbapi_connection = AbortingConnection(os.path.join(tmp_dir, 'explain.db'))
+    conn = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'),
+                           connection=SimpleNamespace(dbapi_connection=dbapi_connection))
+    cursor = dbapi_connection.cursor()
+    cursor.execute("CREATE TABLE notes (body TEXT)")
+    cursor.execute("INSERT INTO notes VALUES ('kept')")  # opens the request's transaction
+
+    plan = explain_query(conn, "SELECT * FROM missing_table WHERE id = ?", (1,))
+    assert plan[0].startswith('plan unavailable')
+    assert not dbapi_connection.aborted
+    cursor.execute("SELECT body FROM notes")
+    assert cursor.fetchall() == [('kept',)]
+    dbapi_connection.raw.commit()
+
+    assert explain_query(conn, "SELECT * FROM notes WHERE body = ?", ('kept',))  # EXPLAIN output lines
+    assert explain_query(conn, "DELETE FROM notes", ()) is None
+
+if __name__ == "__main__":
+    setup_module(sys.modules[__name__])
+    test_fingerprint_normalization()
+    test_p95_and_sorting()
+    test_slow_select_captures_plan_once()
+    test_failed_explain_leaves_transaction_usable()
+    teardown_module(sys.modules[__name__])
+    print("Query stats tests passed")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test read replica routing: @read_replica reads, primary writes and read-your-writes stickiness.
+
+A second SQLite file, filled with `sync_sqlite_replica`, stands in for the replica bind.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from flask import g
+from sqlalchemy import create_engine, text
+from app import (app, db, init_db, database_engine_options, sync_sqlite_replica,
+                 read_replica, primary_reads, Category)
+
+REPLICA_URL = f'sqlite:///{tmp_dir}/replica.db'
+REPLICA_TITLE = 'Served by the replica'
+
+def setup_module(module):
+    with app.app_context():
+        init_db()
+    response = login().post('/api/items', json={
+        'title': 'Replica test item', 'description': 'Test item', 'category_id': 1,
+        'size': 'M', 'price_per_day': 100, 'security_deposit': 500})
+    assert response.status_code == 201
+    with app.app_context():
+        # Bind the replica here rather than through DATABASE_REPLICA_URL: the app may
+        # already have been imported without one by another test module
+        db.engines['replica'] = create_engine(REPLICA_URL, **database_engine_options(REPLICA_URL))
+        sync_sqlite_replica()
+        with db.engines['replica'].begin() as conn:
+            conn.execute(text("UPDATE items SET title = :title"), {'title': REPLICA_TITLE})
+
+def teardown_module(module):
+    with app.app_context():
+        db.engines.pop('replica').dispose()
+
+def login():
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'demo@wearhouse.com', 'password': 'password123'})
+    assert response.status_code == 200
+    with client.session_transaction() as sess:
+        sess.pop('db_wrote_at', None)
+    return client
+
+def user_item_titles(client):
+    response = client.get('/api/user/items')
+    assert response.status_code == 200
+    return {item['title'] for item in response.get_json()}
+
+def test_read_replica_routes_read_the_replica():
+    """A client that has not written reads @read_replica routes from the replica"""
+    assert user_item_titles(login()) == {REPLICA_TITLE}
+
+def test_flushes_go_to_the_primary():
+    """Writes inside a replica-routed request land in the primary only"""
+    with app.test_request_context():
+        g.db_use_replica = True
+        db.session.add(Category(name='Replica test', slug='replica-test'))
+        db.session.commit()
+        assert Category.query.filter_by(slug='replica-test').first() is None  # replica read
+        with primary_reads():
+            assert Category.query.filter_by(slug='replica-test').first() is not None
+        db.session.remove()
+        with db.engines['replica'].connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM categories WHERE slug = 'replica-test'")).scalar() == 0
+
+def test_write_pins_client_to_primary():
+    """After a write the client reads the primary for REPLICA_STICKY_SECONDS, then the replica again"""
+    client = login()
+    response = client.post('/api/items', json={
+        'title': 'Fresh on the primary', 'description': 'Test item', 'category_id': 1,
+        'size': 'M', 'price_per_day': 100, 'security_deposit': 500})
+    assert response.status_code == 201
+    with client.session_transaction() as sess:
+        wrote_at = sess['db_wrote_at']
+    assert time.time() - wrote_at < app.config['REPLICA_STICKY_SECONDS']
+
+    titles = user_item_titles(client)
+    assert 'Fresh on the primary' in titles and REPLICA_TITLE not in titles
+
+    with client.session_transaction() as sess:
+        sess['db_wrote_at'] = time.time() - app.config['REPLICA_STICKY_SECONDS'] - 1
+    assert user_item_titles(client) == {REPLICA_TITLE}
+
+def test_primary_reads_restores_flag():
+    """primary_reads() switches to the primary and restores the previous routing, even on errors"""
+    @read_replica
+    def view():
+        assert g.db_use_replica is True
+        with primary_reads():
+            assert g.db_use_replica is False
+            assert db.session.get_bind() is db.engine
+        assert db.session.get_bind() is db.engines['replica']
+        try:
+            with primary_reads():
+                raise ValueError
+        except ValueError:
+            pass
+        return g.db_use_replica
+
+    with app.test_request_context():
+        assert view() is True
+        g.db_use_replica = False
+        with primary_reads():
+            pass
+        assert g.db_use_replica is False
+    with app.app_context(), primary_reads():  # usable outside a request too, e.g. from CLI commands
+        assert db.session.get_bind() is db.engine
+
+if __name__ == "__main__":
+    setup_module(sys.modules[__name__])
+    test_read_replica_routes_read_the_replica()
+    test_flushes_go_to_the_primary()
+    test_write_pins_client_to_primary()
+    test_primary_reads_restores_flag()
+    teardown_module(sys.modules[__name__])
+    print("Replica routing tests passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the per-request timing breakdown sent in the Server-Timing header
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from app import app, init_db, invalidate_catalog_cache
+
+def setup_module(module):
+    module.original_server_timing = app.config['SERVER_TIMING']
+    app.config['SERVER_TIMING'] = True
+    with app.app_context():
+        init_db()
+
+def teardown_module(module):
+    app.config['SERVER_TIMING'] = module.original_server_timing
+
+def server_timing(response):
+    """Parse 'db;dur=1.2;desc="3 queries", ser;dur=0.1' into {name: {'dur': 1.2, 'desc': ...}}"""
+    entries = {}
+    for entry in response.headers['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        entries[name] = {'dur': float(values['dur']), 'desc': values.get('desc', '').strip('"')}
+    return entries
+
+def test_server_timing_entries():
+    """db, ser, app and total are reported; the parts add up to the total"""
+    invalidate_catalog_cache()
+    response = app.test_client().get('/api/categories')
+    assert response.status_code == 200
+    timing = server_timing(response)
+    assert list(timing) == ['db', 'ser', 'app', 'total']
+    assert all(entry['dur'] >= 0 for entry in timing.values())
+    parts = timing['db']['dur'] + timing['ser']['dur'] + timing['app']['dur']
+    assert abs(parts - timing['total']['dur']) <= 0.05  # each value is rounded to 0.01ms
+
+def test_query_count_on_catalog_endpoint():
+    """A cold /api/categories runs the count and category queries; a cached one runs none"""
+    client = app.test_client()
+    invalidate_catalog_cache()
+    assert server_timing(client.get('/api/categories'))['db']['desc'] == '2 queries'
+    cached = server_timing(client.get('/api/categories'))
+    assert cached['db'] == {'dur': 0.0, 'desc': '0 queries'}
+
+def test_header_is_opt_in():
+    """Without SERVER_TIMING the breakdown is only logged"""
+    app.config['SERVER_TIMING'] = False
+    try:
+        assert 'Server-Timing' not in app.test_client().get('/api/categories').headers
+    finally:
+        app.config['SERVER_TIMING'] = True
+
+if __name__ == "__main__":
+    setup_module(sys.modules[__name__])
+    test_server_timing_entries()
+    test_query_count_on_catalog_endpoint()
+    test_header_is_opt_in()
+    teardown_module(sys.modules[__name__])
+    print("Request timing tests passed")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Test content-addressed uploads: dedup, image variants, backfill and cleanup
+"""
+
+import io
+import os
+import json
+import base64
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Set up environment: a private copy of the database and upload folder
+tmp_dir = tempfile.mkdtemp(prefix='rentrobe-test-')
+source_db = project_root / 'instance' / 'wearhouse.db'
+if source_db.exists():
+    shutil.copy(source_db, os.path.join(tmp_dir, 'test.db'))
+os.environ['DATABASE_URL'] = f'sqlite:///{tmp_dir}/test.db'
+os.environ['SECRET_KEY'] = 'test-secret-key'
+
+from PIL import Image
+import app as app_module
+from app import app, db, init_db, Item, ItemImage, gc_uploads, backfill_images, compute_placeholder
+
+upload_folder = os.path.join(tmp_dir, 'uploads')
+
+def setup_module(module):
+    module.original_config = {key: app.config[key] for key in
+                              ('UPLOAD_FOLDER', 'IMAGE_CACHE_FOLDER', 'BACKFILL_CHECKPOINT')}
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    app.config['IMAGE_CACHE_FOLDER'] = os.path.join(tmp_dir, 'image-cache')
+    app.config['BACKFILL_CHECKPOINT'] = os.path.join(tmp_dir, 'backfill.json')
+    os.makedirs(app.config['IMAGE_CACHE_FOLDER'], exist_ok=True)
+    os.makedirs(upload_folder, exist_ok=True)
+    with app.app_context():
+        init_db()
+
+def teardown_module(module):
+    # The app object is shared with other test modules in the same run
+    app.config.update(module.original_config)
+
+def png_bytes(color, size=(40, 30)):
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, 'PNG')
+    return output.getvalue()
+
+def make_client():
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'demo@wearhouse.com', 'password': 'password123'})
+    assert response.status_code == 200
+    response = client.post('/api/items', json={
+        'title': 'Upload test', 'description': 'Test item', 'category_id': 1,
+        'size': 'M', 'price_per_day': 100, 'security_deposit': 500})
+    assert response.status_code == 201
+    return client, response.get_json()['item_id']
+
+def upload(client, item_id, data):
+    response = client.post(f'/api/items/{item_id}/upload',
+                           data={'images': (io.BytesIO(data), 'photo.png')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['images']
+
+def test_identical_uploads_share_one_file():
+    """A repeated upload reuses the stored file without touching it; its ETag is the content hash"""
+    client, item_id = make_client()
+    data = png_bytes((200, 40, 40))
+    [first] = upload(client, item_id, data)
+    path = os.path.join(upload_folder, first)
+    mtime = os.stat(path).st_mtime_ns
+
+    [second] = upload(client, item_id, data)
+    assert second == first
+    assert os.stat(path).st_mtime_ns == mtime  # cached variants and ETags stay valid
+    assert os.listdir(upload_folder) == [first]
+    with app.app_context():
+        assert ItemImage.query.filter_by(filename=first).count() == 2
+
+    response = client.get(f'/static/uploads/{first}')
+    assert response.headers['ETag'] == '"%s"' % first.rsplit('.', 1)[0]
+
+def test_collected_file_is_restored_after_commit():
+    """A reused file that gc-uploads removes before the new row commits is written again"""
+    client, item_id = make_client()
+    data = png_bytes((40, 200, 40))
+    [filename] = upload(client, item_id, data)
+    path = os.path.join(upload_folder, filename)
+
+    original_save_image = app_module.save_image
+    def save_then_collect(file):
+        stored = original_save_image(file)
+        os.remove(path)  # gc-uploads runs between the dedup hit and the commit
+        return stored
+    app_module.save_image = save_then_collect
+    try:
+        assert upload(client, item_id, data) == [filename]
+    finally:
+        app_module.save_image = original_save_image
+    assert os.path.exists(path)
+    assert client.get(f'/static/uploads/{filename}').status_code == 200
+
+def test_proxy_serve_modes():
+    """x-accel and x-sendfile hand the file to the proxy; a 304 carries no hand-off header"""
+    name = 'b' * 64 + '.jpg'
+    with open(os.path.join(upload_folder, name), 'wb') as f:
+        f.write(b'jpeg bytes')
+    os.utime(os.path.join(upload_folder, name), (1700000000.5, 1700000000.5))
+    client = app.test_client()
+    try:
+        for mode, header, value in (
+            ('x-accel', 'X-Accel-Redirect', f'/protected-uploads/{name}'),
+            ('x-sendfile', 'X-Sendfile', os.path.join(upload_folder, name)),
+        ):
+            app.config['UPLOAD_SERVE_MODE'] = mode
+            response = client.get(f'/static/uploads/{name}')
+            assert response.status_code == 200
+            assert response.headers[header] == value
+            assert response.get_data() == b''
+            assert response.headers['ETag'] == '"%s"' % ('b' * 64)
+            assert response.headers['Last-Modified'] == 'Tue, 14 Nov 2023 22:13:20 GMT'
+            assert 'immutable' in response.headers['Cache-Control']
+
+            response = client.get(f'/static/uploads/{name}', headers={'If-None-Match': response.headers['ETag']})
+            assert response.status_code == 304
+            assert header not in response.headers
+    finally:
+        app.config['UPLOAD_SERVE_MODE'] = 'direct'
+
+def test_gc_uploads_merge_and_delete():
+    """Only old files without rows are collected; spilled runs merge against paged references"""
+    client, item_id = make_client()
+    kept = [upload(client, item_id, png_bytes((10 * i, 0, 0)))[0] for i in range(3)]
+    inactive_client, inactive_id = make_client()
+    [inactive] = upload(inactive_client, inactive_id, png_bytes((0, 0, 250)))
+    with app.app_context():
+        db.session.get(Item, inactive_id).is_active = False
+        db.session.commit()
+    orphans = [f'{i:064x}.jpg' for i in range(7)]
+    for name in orphans:
+        with open(os.path.join(upload_folder, name), 'wb') as f:
+            f.write(b'orphan')
+    fresh = 'f' * 64 + '.jpg'
+    with open(os.path.join(upload_folder, fresh), 'wb') as f:
+        f.write(b'just uploaded, row not committed yet')
+    old = time.time() - 48 * 3600
+    for name in os.listdir(upload_folder):
+        if name != fresh:
+            os.utime(os.path.join(upload_folder, name), (old, old))
+    before = set(os.listdir(upload_folder))
+
+    with app.app_context():
+        # Tiny batches: several sorted runs on disk and several reference pages
+        stats = gc_uploads(dry_run=True, batch_size=2)
+        assert stats['orphans'] >= len(orphans)
+        assert set(os.listdir(upload_folder)) == before
+
+        stats = gc_uploads(dry_run=False, batch_size=2)
+        assert stats['too_new'] >= 1
+        assert stats['deleted'] == stats['orphans']
+        remaining = set(os.listdir(upload_folder))
+        assert not remaining & set(orphans)
+        assert set(kept) | {inactive, fresh} <= remaining
+
+        gc_uploads(dry_run=False, batch_size=2, include_inactive=False)
+        assert inactive not in set(os.listdir(upload_folder))
+        assert set(kept) <= set(os.listdir(upload_folder))
+
+def test_placeholder_uses_dominant_color():
+    """A red dress on white gets a red placeholder, not the pink average"""
+    image = Image.new('RGB', (400, 300), (255, 255, 255))
+    image.paste((200, 20, 30), (100, 0, 340, 300))  # 60% of the frame
+    placeholder = compute_placeholder(image)
+    assert placeholder['placeholder_color'] == '#c8141e'
+    assert placeholder['placeholder'].startswith('data:image/jpeg;base64,')
+    preview = Image.open(io.BytesIO(base64.b64decode(placeholder['placeholder'].split(',', 1)[1])))
+    assert max(preview.size) == 16
+
+def clear_image_cache():
+    cache_folder = app.config['IMAGE_CACHE_FOLDER']
+    for name in os.listdir(cache_folder):
+        os.remove(os.path.join(cache_folder, name))
+    app_module._image_cache_stats['bytes'] = None
+
+def test_variant_render_and_cache_hit():
+    """The first request renders a resized variant; repeats are served from the cache"""
+    clear_image_cache()
+    client, item_id = make_client()
+    [filename] = upload(client, item_id, png_bytes((120, 60, 200), size=(400, 300)))
+    stats = app_module._image_cache_stats
+    hits, misses = stats['hits'], stats['misses']
+
+    response = client.get(f'/images/{filename}?w=150&format=webp')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert Image.open(io.BytesIO(response.get_data())).size == (160, 120)  # snapped up to 160w
+    assert (stats['hits'], stats['misses']) == (hits, misses + 1)
+
+    response = client.get(f'/images/{filename}?w=160&format=webp')
+    assert response.status_code == 200
+    assert (stats['hits'], stats['misses']) == (hits + 1, misses + 1)
+    assert len(os.listdir(app.config['IMAGE_CACHE_FOLDER'])) == 1
+
+def test_cache_evicts_least_recently_used():
+    """Over the size limit, the least recently served variants go first"""
+    clear_image_cache()
+    client, item_id = make_client()
+    names = [upload(client, item_id, png_bytes((60 * i, 90, 30), size=(400, 300)))[0] for i in range(3)]
+    paths = [app_module.get_image_variant(name, 160, 'jpeg') for name in names]
+    now = time.time()
+    for age, path in zip((300, 200, 100), paths):
+        os.utime(path, (now - age, now - age))
+    assert client.get(f'/images/{names[0]}?w=160').status_code == 200  # oldest is used again
+
+    sizes = [os.path.getsize(path) for path in paths]
+    original_limit = app.config['IMAGE_CACHE_MAX_BYTES']
+    app.config['IMAGE_CACHE_MAX_BYTES'] = sum(sizes) - 1
+    evictions = app_module._image_cache_stats['evictions']
+    try:
+        app_module.evict_image_cache()
+    finally:
+        app.config['IMAGE_CACHE_MAX_BYTES'] = original_limit
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
+    assert app_module._image_cache_stats['evictions'] == evictions + 1
+    assert app_module._image_cache_stats['bytes'] == sizes[0] + sizes[2]
+
+def test_backfill_retries_failed_images():
+    """A file that fails to render is kept in the checkpoint and retried by the next run"""
+    client, item_id = make_client()
+    [good] = upload(client, item_id, png_bytes((90, 90, 20)))
+    broken = 'broken-backfill.png'
+    with open(os.path.join(upload_folder, broken), 'wb') as f:
+        f.write(b'not an image')
+    with app.app_context():
+        row = ItemImage(item_id=item_id, filename=broken)
+        db.session.add(row)
+        db.session.commit()
+        broken_id = row.id
+
+        stats = backfill_images(workers=1, widths=[32], formats=('jpeg',), restart=True)
+        assert stats['failed'] == 1
+        assert stats['failed_ids'] == [broken_id]
+        with open(app.config['BACKFILL_CHECKPOINT']) as f:
+            checkpoint = json.load(f)
+        assert checkpoint['failed_ids'] == [broken_id]
+        assert checkpoint['last_id'] >= broken_id
+        assert ItemImage.query.filter_by(filename=good).first().placeholder is not None
+
+        # Resuming only visits the failed row, which now renders
+        with open(os.path.join(upload_folder, broken), 'wb') as f:
+            f.write(png_bytes((20, 90, 90)))
+        stats = backfill_images(workers=1, widths=[32], formats=('jpeg',))
+        assert stats['rows'] == 1
+        assert stats['failed'] == 0 and stats['failed_ids'] == []
+        assert not os.path.exists(app.config['BACKFILL_CHECKPOINT'])
+        assert db.session.get(ItemImage, broken_id).placeholder_color is not None
+
+if __name__ == "__main__":
+    setup_module(sys.modules[__name__])
+    test_identical_uploads_share_one_file()
+    test_collected_file_is_restored_after_commit()
+    test_proxy_serve_modes()
+    test_gc_uploads_merge_and_delete()
+    test_placeholder_uses_dominant_color()
+    test_variant_render_and_cache_hit()
+    test_cache_evicts_least_recently_used()
+    test_backfill_retries_failed_images()
+    teardown_module(sys.modules[__name__])
+    print("Upload tests passed")